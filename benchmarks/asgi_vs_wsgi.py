@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks import django_env
+from benchmarks.load import run_asgi, run_wsgi
+
+# Настройка, которая включает асинхронные страницы проекта.
+ASYNC_VIEWS = {
+    'ya_news': ('NEWS_ASYNC_VIEWS', ('home', 'detail')),
+    'ya_note': ('NOTES_ASYNC_VIEWS', ('list', 'detail')),
+}
+
+
+def prepare(project):
+    """Заполняет базу. Возвращает URL страниц и пользователя для входа."""
+    from django.urls import reverse
+
+    from benchmarks.seed import seed_news, seed_notes, seed_users
+
+    users = seed_users(1)
+    if project == 'ya_news':
+        from news.models import News
+
+        seed_news(news_count=20, comments_count=1200, users=users)
+        urls = [reverse('news:home')] + [
+            reverse('news:detail', args=(pk,))
+            for pk in News.objects.values_list('pk', flat=True)
+        ]
+        return urls, None
+    from notes.models import Note
+
+    seed_notes(notes_count=60, users=users)
+    urls = [reverse('notes:list')] + [
+        reverse('notes:detail', args=(slug,))
+        for slug in Note.objects.values_list('slug', flat=True)
+    ]
+    return urls, users[0]
+
+
+def measure(project, mode, total, concurrency):
+    """Один прогон в текущем процессе на временной базе."""
+    overrides = {}
+    if mode == 'asgi':
+        overrides = dict((ASYNC_VIEWS[project],))
+    with tempfile.TemporaryDirectory() as directory:
+        django_env.setup(
+            project, Path(directory) / 'bench.sqlite3', **overrides
+        )
+        urls, user = prepare(project)
+        if mode == 'asgi':
+            return asyncio.run(run_asgi(urls, user, total, concurrency))
+        return run_wsgi(urls, user, total, concurrency)
+
+
+def compare(project, total, concurrency):
+    """
+    Запускает оба режима в отдельных процессах.
+
+    Адреса строятся при импорте urls.py, поэтому асинхронные
+    представления нельзя включить в уже настроенном процессе.
+    """
+    results = {}
+    for mode in ('wsgi', 'asgi'):
+        output = subprocess.run(
+            [
+                sys.executable, '-m', 'benchmarks.asgi_vs_wsgi', project,
+                '--mode', mode,
+                '--requests', str(total),
+                '--concurrency', str(concurrency),
+            ],
+            cwd=django_env.ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[mode] = json.loads(output.splitlines()[-1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Пропускная способность страниц под WSGI и ASGI.'
+    )
+    parser.add_argument('project', choices=sorted(django_env.PROJECTS))
+    parser.add_argument('--mode', choices=('wsgi', 'asgi'))
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    args = parser.parse_args()
+    if args.mode:
+        result = measure(
+            args.project, args.mode, args.requests, args.concurrency
+        )
+        print(json.dumps(result))
+        return
+    results = compare(args.project, args.requests, args.concurrency)
+    for mode, result in results.items():
+        print(
+            f'{mode}: {result["rps"]} запросов/с, '
+            f'p50 {result["p50_ms"]} мс, p99 {result["p99_ms"]} мс'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROJECTS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+
+
+def setup(project, database, database_settings=None, **overrides):
+    """
+    Настраивает Django выбранного проекта на отдельной базе SQLite.
+
+    Таблицы создаются миграциями. database_settings дополняют
+    настройки базы, остальные настройки можно переопределить
+    именованными аргументами.
+    """
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    sys.path.insert(0, str(ROOT / project))
+    os.environ['DJANGO_SETTINGS_MODULE'] = PROJECTS[project]
+    settings.DATABASES['default']['NAME'] = str(database)
+    settings.DATABASES['default'].update(database_settings or {})
+    # Кэш рядом с базой: страницы из кэша другого прогона не подходят.
+    settings.CACHES['default']['LOCATION'] = str(
+        Path(database).parent / 'cache'
+    )
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+    call_command('migrate', verbosity=0)
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from threading import local
+
+from benchmarks.stats import summarize
+
+
+def check(response, url):
+    if response.status_code != HTTPStatus.OK:
+        raise RuntimeError(f'{url}: {response.status_code}')
+
+
+def workload(urls, total):
+    return [urls[index % len(urls)] for index in range(total)]
+
+
+def run_wsgi(urls, user, total, concurrency):
+    """Потоки с django.test.Client, как у многопоточного WSGI-сервера."""
+    from django.test import Client
+
+    login = Client()
+    if user is not None:
+        login.force_login(user)
+    clients = local()
+
+    def fetch(url):
+        if not hasattr(clients, 'client'):
+            clients.client = Client()
+            clients.client.cookies.update(login.cookies)
+        started = time.perf_counter()
+        response = clients.client.get(url)
+        latency = time.perf_counter() - started
+        check(response, url)
+        return latency
+
+    for url in urls:
+        fetch(url)
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(fetch, workload(urls, total)))
+        return summarize(latencies, time.perf_counter() - started)
+
+
+async def run_asgi(urls, user, total, concurrency):
+    """Одновременные запросы через AsyncClient в одном цикле событий."""
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    if user is not None:
+        await asyncio.get_running_loop().run_in_executor(
+            None, client.force_login, user
+        )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(url):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(url)
+            latency = time.perf_counter() - started
+        check(response, url)
+        return latency
+
+    for url in urls:
+        await fetch(url)
+    started = time.perf_counter()
+    latencies = await asyncio.gather(
+        *(fetch(url) for url in workload(urls, total))
+    )
+    return summarize(latencies, time.perf_counter() - started)
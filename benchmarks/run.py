@@ -0,0 +1,272 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from http import HTTPStatus
+from pathlib import Path
+
+from benchmarks import django_env
+from benchmarks.load import run_wsgi
+from benchmarks.seed import SCALES, seed_news, seed_notes, seed_users
+
+NAMESPACES = {
+    'ya_news': ('news', 'users'),
+    'ya_note': ('notes', 'users'),
+}
+
+# GET-параметры страниц, которым без них нечего показать.
+QUERY_PARAMS = {
+    'news:search': 'q=Новость',
+    'notes:search': 'q=Заметка',
+}
+
+
+def git_commit():
+    result = subprocess.run(
+        ['git', 'rev-parse', 'HEAD'],
+        cwd=django_env.ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() or None
+
+
+def seed(project, volumes):
+    """Заполняет пустую базу. Уже заполненная используется как есть."""
+    from django.contrib.auth import get_user_model
+
+    if get_user_model().objects.exists():
+        return
+    users = seed_users(volumes['users'])
+    if project == 'ya_news':
+        seed_news(volumes['news'], volumes['comments'], users)
+    else:
+        seed_notes(volumes['notes'], users)
+
+
+def sample_arguments(project):
+    """
+    Аргументы URL из данных базы и автор, которому они принадлежат.
+
+    Возвращает общие аргументы, аргументы отдельных имён URL
+    и пользователя для страниц, закрытых от анонимов.
+    """
+    if project == 'ya_news':
+        from news.models import Comment
+
+        comment = Comment.objects.select_related('news', 'author').first()
+        date = comment.news.date
+        return (
+            {
+                'pk': comment.news.pk,
+                'year': date.year,
+                'month': date.month,
+                'day': date.day,
+            },
+            {
+                'news:edit': {'pk': comment.pk},
+                'news:delete': {'pk': comment.pk},
+            },
+            comment.author,
+        )
+    from notes.models import Note
+
+    note = Note.objects.select_related('author').first()
+    return {'slug': note.slug}, {}, note.author
+
+
+def url_names(namespaces):
+    """Имена URL пространств имён с именами их аргументов."""
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    for namespace in namespaces:
+        _, namespace_resolver = resolver.namespace_dict[namespace]
+        for pattern in namespace_resolver.url_patterns:
+            if pattern.name:
+                yield (
+                    f'{namespace}:{pattern.name}',
+                    tuple(pattern.pattern.converters),
+                )
+
+
+def build_urls(project):
+    """URL для каждого имени и автор данных, на которые они ссылаются."""
+    from django.urls import reverse
+
+    arguments, overrides, author = sample_arguments(project)
+    urls = {}
+    for name, params in url_names(NAMESPACES[project]):
+        kwargs = {param: arguments[param] for param in params}
+        kwargs.update(overrides.get(name, {}))
+        url = reverse(name, kwargs=kwargs)
+        if name in QUERY_PARAMS:
+            url = f'{url}?{QUERY_PARAMS[name]}'
+        urls[name] = url
+    return urls, author
+
+
+def probe(url, author):
+    """
+    Кем открывать страницу: анонимом или автором данных.
+
+    Второе значение ложно, если страница не отвечает на GET.
+    """
+    from django.test import Client
+
+    response = Client().get(url)
+    if response.status_code == HTTPStatus.OK:
+        return None, True
+    if response.status_code in (HTTPStatus.FOUND, HTTPStatus.FORBIDDEN):
+        client = Client()
+        client.force_login(author)
+        if client.get(url).status_code == HTTPStatus.OK:
+            return author, True
+    return None, False
+
+
+def measure(project, volumes, database, total, concurrency):
+    """Замеры всех страниц проекта в текущем процессе."""
+    django_env.setup(project, database)
+    seed(project, volumes)
+    urls, author = build_urls(project)
+    results = {}
+    for name, url in urls.items():
+        user, ok = probe(url, author)
+        if not ok:
+            results[name] = {'url': url, 'skipped': 'не отвечает на GET'}
+            continue
+        results[name] = {
+            'url': url,
+            'user': 'author' if user else 'anonymous',
+            **run_wsgi([url], user, total, concurrency),
+        }
+    return results
+
+
+def run_project(project, args):
+    """Прогон проекта в отдельном процессе: Django настраивается один раз."""
+    command = [
+        sys.executable, '-m', 'benchmarks.run', project,
+        '--single',
+        '--scale', args.scale,
+        '--requests', str(args.requests),
+        '--concurrency', str(args.concurrency),
+    ]
+    if args.database:
+        command += ['--database', str(Path(args.database).resolve())]
+    output = subprocess.run(
+        command,
+        cwd=django_env.ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def change(old, new):
+    if not old or new is None:
+        return '—'
+    return f'{(new - old) / old:+.0%}'
+
+
+def print_report(report, baseline=None):
+    """Таблица результатов и изменения относительно прошлого прогона."""
+    for project, results in report['projects'].items():
+        old_results = (baseline or {}).get('projects', {}).get(project, {})
+        for name, result in results.items():
+            if 'skipped' in result:
+                print(f'{name}: пропущено, {result["skipped"]}')
+                continue
+            line = (
+                f'{name}: {result["rps"]} запросов/с, '
+                f'p50 {result["p50_ms"]} мс, p99 {result["p99_ms"]} мс'
+            )
+            old = old_results.get(name)
+            if old and 'skipped' not in old:
+                line += (
+                    f' (запросов/с {change(old["rps"], result["rps"])}, '
+                    f'p50 {change(old["p50_ms"], result["p50_ms"])}, '
+                    f'p99 {change(old["p99_ms"], result["p99_ms"])})'
+                )
+            print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=(
+            'Задержки и пропускная способность всех страниц '
+            'YaNews и YaNote на заполненной базе SQLite.'
+        )
+    )
+    parser.add_argument(
+        'projects', nargs='*',
+        help=(
+            f'Проекты из {", ".join(sorted(django_env.PROJECTS))}; '
+            'по умолчанию — все.'
+        ),
+    )
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument(
+        '--database',
+        help=(
+            'Файл базы. Заполняется при первом запуске и переиспользуется; '
+            'для нескольких проектов — каталог с базой на проект.'
+        ),
+    )
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--output', help='Куда записать результаты в JSON.')
+    parser.add_argument(
+        '--baseline', help='JSON прошлого прогона для сравнения.'
+    )
+    parser.add_argument(
+        '--single', action='store_true', help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+    args.projects = args.projects or sorted(django_env.PROJECTS)
+    unknown = set(args.projects) - set(django_env.PROJECTS)
+    if unknown:
+        parser.error(f'неизвестные проекты: {", ".join(sorted(unknown))}')
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.single:
+        with tempfile.TemporaryDirectory() as directory:
+            database = args.database or Path(directory) / 'bench.sqlite3'
+            results = measure(
+                args.projects[0], SCALES[args.scale], database,
+                args.requests, args.concurrency,
+            )
+        print(json.dumps(results))
+        return
+    report = {
+        'commit': git_commit(),
+        'scale': args.scale,
+        'volumes': SCALES[args.scale],
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'projects': {},
+    }
+    for project in args.projects:
+        project_args = argparse.Namespace(**vars(args))
+        if args.database and len(args.projects) > 1:
+            Path(args.database).mkdir(parents=True, exist_ok=True)
+            project_args.database = Path(args.database) / f'{project}.sqlite3'
+        report['projects'][project] = run_project(project, project_args)
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+    print_report(report, baseline)
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+from datetime import timedelta
+from itertools import islice
+
+# Объёмы данных: small — для быстрой проверки, full — как в продакшене.
+SCALES = {
+    'small': {
+        'users': 10,
+        'news': 1000,
+        'comments': 20000,
+        'notes': 10000,
+    },
+    'full': {
+        'users': 1000,
+        'news': 100000,
+        'comments': 10000000,
+        'notes': 1000000,
+    },
+}
+
+BATCH_SIZE = 5000
+USERNAME = 'bench-user-{index}'
+# Новости распределяются по дням за последние три года.
+NEWS_DAYS = 3 * 365
+
+
+def batched(objects, size=BATCH_SIZE):
+    objects = iter(objects)
+    batch = list(islice(objects, size))
+    while batch:
+        yield batch
+        batch = list(islice(objects, size))
+
+
+def bulk_create(model, objects):
+    """Вставляет объекты пачками, не держа их все в памяти."""
+    from django.db import transaction
+
+    with transaction.atomic():
+        for batch in batched(objects):
+            model.objects.bulk_create(batch)
+
+
+def seed_users(count):
+    """Пользователи bench-user-N. Возвращает их по порядку номеров."""
+    from django.contrib.auth import get_user_model
+
+    user_model = get_user_model()
+    bulk_create(
+        user_model,
+        (
+            user_model(username=USERNAME.format(index=index))
+            for index in range(count)
+        ),
+    )
+    return list(user_model.objects.filter(
+        username__startswith='bench-user-'
+    ).order_by('pk'))
+
+
+def seed_news(news_count, comments_count, users):
+    """
+    Новости и комментарии пользователей по кругу.
+
+    Счётчики комментариев и архива пересчитываются после вставки,
+    потому что bulk_create не отправляет сигналы.
+    """
+    from django.utils import timezone
+
+    from news.models import Comment, News, NewsMonthCount
+
+    today = timezone.localdate()
+    bulk_create(
+        News,
+        (
+            News(
+                title=f'Новость {index}',
+                text='Текст новости.',
+                date=today - timedelta(days=index % NEWS_DAYS),
+            )
+            for index in range(news_count)
+        ),
+    )
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    now = timezone.now()
+    bulk_create(
+        Comment,
+        (
+            Comment(
+                news_id=news_ids[index % len(news_ids)],
+                author=users[index % len(users)],
+                text=f'Комментарий {index}',
+                created=now - timedelta(seconds=comments_count - index),
+            )
+            for index in range(comments_count)
+        ),
+    )
+    News.objects.recount_comments()
+    NewsMonthCount.objects.rebuild()
+
+
+def seed_notes(notes_count, users):
+    """Заметки пользователей по кругу с номерами изменений по порядку."""
+    from notes.models import Note, NoteSequence
+
+    bulk_create(
+        Note,
+        (
+            Note(
+                title=f'Заметка {index}',
+                text='Текст заметки.',
+                slug=f'note-{index}',
+                author=users[index % len(users)],
+                version=index // len(users) + 1,
+            )
+            for index in range(notes_count)
+        ),
+    )
+    NoteSequence.objects.bulk_create(
+        NoteSequence(
+            author=user,
+            value=len(range(index, notes_count, len(users))),
+        )
+        for index, user in enumerate(users)
+    )
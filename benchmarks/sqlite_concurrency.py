@@ -0,0 +1,204 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from itertools import count
+from pathlib import Path
+from threading import local
+
+from benchmarks import django_env
+from benchmarks.stats import summarize
+
+# Настройки базы и проекта для каждого профиля: default — SQLite
+# по умолчанию и новое соединение на каждый запрос, production —
+# настройки из settings.py как есть.
+PROFILES = {
+    'default': (
+        {'CONN_MAX_AGE': 0, 'OPTIONS': {}},
+        {'SQLITE_PRAGMAS': {}},
+    ),
+    'production': ({}, {}),
+}
+
+# Лимиты частоты записи не должны влиять на замер.
+UNLIMITED = {
+    scope: {'ip': (10 ** 9, 1), 'user': (10 ** 9, 1)}
+    for scope in ('comment', 'note')
+}
+
+
+def prepare(project):
+    """
+    Заполняет базу.
+
+    Возвращает адреса для чтения, функцию, которая строит запрос
+    на запись, и пользователя для входа.
+    """
+    from django.urls import reverse
+
+    from benchmarks.seed import seed_news, seed_notes, seed_users
+
+    users = seed_users(1)
+    numbers = count()
+    if project == 'ya_news':
+        from news.models import News
+
+        seed_news(news_count=20, comments_count=1000, users=users)
+        urls = [
+            reverse('news:detail', args=(pk,))
+            for pk in News.objects.values_list('pk', flat=True)
+        ]
+
+        def write_request():
+            url = urls[next(numbers) % len(urls)]
+            return url, {'text': 'Комментарий под нагрузкой'}
+
+        return urls, write_request, users[0]
+    from notes.models import Note
+
+    seed_notes(notes_count=200, users=users)
+    urls = [
+        reverse('notes:detail', args=(slug,))
+        for slug in Note.objects.values_list('slug', flat=True)
+    ]
+    add_url = reverse('notes:add')
+
+    def write_request():
+        return add_url, {
+            'title': f'Заметка под нагрузкой {next(numbers)}',
+            'text': 'Текст заметки.',
+            'slug': '',
+        }
+
+    return urls, write_request, users[0]
+
+
+def run(urls, write_request, user, total, concurrency, writes):
+    """
+    Чтения и записи вперемешку из concurrency потоков.
+
+    Из каждых 100 запросов writes — записи. Ошибки и ответы
+    с неожиданным статусом считаются отдельно и в задержки не входят.
+    """
+    from django.test import Client
+
+    login = Client()
+    login.force_login(user)
+    clients = local()
+
+    def request(index):
+        if not hasattr(clients, 'client'):
+            clients.client = Client()
+            clients.client.cookies.update(login.cookies)
+        write = index % 100 < writes
+        started = time.perf_counter()
+        try:
+            if write:
+                response = clients.client.post(*write_request())
+                ok = response.status_code == HTTPStatus.FOUND
+            else:
+                response = clients.client.get(urls[index % len(urls)])
+                ok = response.status_code == HTTPStatus.OK
+        except Exception:
+            ok = False
+        return write, ok, time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(request, range(total)))
+        elapsed = time.perf_counter() - started
+    report = {'errors': sum(not ok for _, ok, _ in results)}
+    for kind, write in (('reads', False), ('writes', True)):
+        latencies = [
+            latency for is_write, ok, latency in results
+            if ok and is_write == write
+        ]
+        if latencies:
+            report[kind] = summarize(latencies, elapsed)
+    return report
+
+
+def measure(project, profile, total, concurrency, writes):
+    """Один прогон в текущем процессе на временной базе в файле."""
+    from django.db import connection
+
+    database_settings, overrides = PROFILES[profile]
+    with tempfile.TemporaryDirectory() as directory:
+        django_env.setup(
+            project,
+            Path(directory) / 'bench.sqlite3',
+            database_settings,
+            RATELIMITS=UNLIMITED,
+            **overrides,
+        )
+        urls, write_request, user = prepare(project)
+        report = run(urls, write_request, user, total, concurrency, writes)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            report['journal_mode'] = cursor.fetchone()[0]
+        return report
+
+
+def compare(project, args):
+    """Оба профиля в отдельных процессах: настройки Django не меняются."""
+    results = {}
+    for profile in PROFILES:
+        output = subprocess.run(
+            [
+                sys.executable, '-m', 'benchmarks.sqlite_concurrency',
+                project,
+                '--profile', profile,
+                '--requests', str(args.requests),
+                '--concurrency', str(args.concurrency),
+                '--writes', str(args.writes),
+            ],
+            cwd=django_env.ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[profile] = json.loads(output.splitlines()[-1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            'Чтение и запись из нескольких потоков с настройками SQLite '
+            'по умолчанию и с профилем из settings.py.'
+        )
+    )
+    parser.add_argument('project', choices=sorted(django_env.PROJECTS))
+    parser.add_argument('--profile', choices=sorted(PROFILES))
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument(
+        '--writes', type=int, default=20,
+        help='Сколько запросов из каждых 100 — записи.',
+    )
+    args = parser.parse_args()
+    if args.profile:
+        result = measure(
+            args.project, args.profile,
+            args.requests, args.concurrency, args.writes,
+        )
+        print(json.dumps(result))
+        return
+    for profile, result in compare(args.project, args).items():
+        print(f'{profile} (journal_mode={result["journal_mode"]}):')
+        for kind in ('reads', 'writes'):
+            if kind in result:
+                print(
+                    f'  {kind}: {result[kind]["rps"]} запросов/с, '
+                    f'p50 {result[kind]["p50_ms"]} мс, '
+                    f'p99 {result[kind]["p99_ms"]} мс'
+                )
+        print(f'  ошибок: {result["errors"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,88 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Comment, News
-
-
-class CommentInline(admin.StackedInline):
-    model = Comment
-    extra = 0
+from .models import BadWord, Comment, News, PendingComment
+from .moderation import delete_bad_comments, delete_comments
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
-    inlines = [
-        CommentInline,
-    ]
+    list_display = ('title', 'date', 'comments')
+    date_hierarchy = 'date'
+
+    @admin.display(description='Комментарии', ordering='comment_count')
+    def comments(self, news):
+        """Ссылка на комментарии новости в отдельном списке."""
+        url = reverse('admin:news_comment_changelist')
+        return format_html(
+            '<a href="{}?news__id__exact={}">{}</a>',
+            url, news.pk, news.comment_count,
+        )
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """
+    Комментарии постранично.
+
+    Массовые действия выполняются запросами к набору строк,
+    без сохранения и удаления каждого объекта.
+    """
+    list_display = ('text', 'news', 'author', 'created')
+    list_select_related = ('news', 'author')
+    raw_id_fields = ('news', 'author')
+    date_hierarchy = 'created'
+    list_per_page = 50
+    # Полный COUNT(*) по всей таблице на каждой странице не нужен.
+    show_full_result_count = False
+    actions = ('delete_comments', 'delete_bad_comments')
+
+    def get_readonly_fields(self, request, obj=None):
+        """
+        Новость существующего комментария не меняется.
+
+        Счётчики комментариев сдвигаются только при создании
+        и удалении, а кэш сбрасывается лишь для текущей новости.
+        """
+        readonly_fields = super().get_readonly_fields(request, obj)
+        if obj is not None:
+            return (*readonly_fields, 'news')
+        return readonly_fields
+
+    def get_actions(self, request):
+        """Стандартное удаление загружает и удаляет объекты по одному."""
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(
+        description='Удалить выбранные комментарии',
+        permissions=('delete',),
+    )
+    def delete_comments(self, request, queryset):
+        deleted = delete_comments(queryset)
+        self.message_user(
+            request, f'Удалено комментариев: {deleted}', messages.SUCCESS
+        )
+
+    @admin.action(
+        description='Проверить на запрещённые слова и удалить нарушителей',
+        permissions=('delete',),
+    )
+    def delete_bad_comments(self, request, queryset):
+        deleted = delete_bad_comments(queryset)
+        self.message_user(
+            request,
+            f'Удалено комментариев с запрещёнными словами: {deleted}',
+            messages.SUCCESS,
+        )
+
+
+admin.site.register(BadWord)
+
+
+@admin.register(PendingComment)
+class PendingCommentAdmin(admin.ModelAdmin):
+    list_display = ('text', 'news', 'author', 'created', 'claimed_at')
+    list_select_related = ('news', 'author')
@@ -0,0 +1,94 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import condition, require_safe
+
+from .caching import cached_comment_page, home_version, news_version
+from .models import News
+
+
+def serialize_news(news):
+    return {
+        'id': news.pk,
+        'title': news.title,
+        'text': news.text,
+        'date': news.date.isoformat(),
+        'comment_count': news.comment_count,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+# Условные запросы проверяются только по ETag. Last-Modified не
+# отдаётся: правки новостей и комментариев не хранят времени
+# изменения, и по одному If-Modified-Since нельзя надёжно ответить 304.
+# ETag строится из версий кэша страниц: их меняют сигналы и массовые
+# операции при любом изменении новостей и комментариев, а проверка
+# не обращается к базе.
+def make_etag(*parts):
+    return md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def news_list_etag(request):
+    return make_etag(home_version(), request.GET.urlencode())
+
+
+def news_etag(request, pk):
+    return make_etag(news_version(pk), request.GET.urlencode())
+
+
+@require_safe
+@condition(etag_func=news_list_etag)
+def news_list(request):
+    """Новости постранично, начиная со свежих."""
+    paginator = Paginator(
+        News.objects.order_by('-date', 'id'),
+        settings.NEWS_COUNT_ON_HOME_PAGE,
+    )
+    page = paginator.get_page(request.GET.get('page'))
+    next_url = None
+    if page.has_next():
+        next_url = (
+            f'{reverse("news:api_list")}?page={page.next_page_number()}'
+        )
+    return JsonResponse({
+        'count': paginator.count,
+        'next': next_url,
+        'results': [serialize_news(news) for news in page],
+    })
+
+
+@require_safe
+@condition(etag_func=news_etag)
+def news_detail(request, pk):
+    return JsonResponse(serialize_news(get_object_or_404(News, pk=pk)))
+
+
+@require_safe
+@condition(etag_func=news_etag)
+def news_comments(request, pk):
+    """Комментарии новости постранично, по курсору как на сайте."""
+    news = get_object_or_404(News, pk=pk)
+    comments, next_cursor = cached_comment_page(
+        news, request.GET.get('cursor')
+    )
+    next_url = None
+    if next_cursor:
+        next_url = (
+            f'{reverse("news:api_comments", args=(pk,))}?cursor={next_cursor}'
+        )
+    return JsonResponse({
+        'next': next_url,
+        'results': [serialize_comment(comment) for comment in comments],
+    })
@@ -1,7 +1,21 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from .metrics import install_query_wrappers
+        from .sqlite import apply_pragmas
+
+        connection_created.connect(
+            apply_pragmas, dispatch_uid='news.sqlite.apply_pragmas'
+        )
+        connection_created.connect(
+            install_query_wrappers,
+            dispatch_uid='news.metrics.install_query_wrappers',
+        )
@@ -0,0 +1,147 @@
+import os
+from collections import deque
+from pathlib import Path
+from threading import Lock
+from uuid import uuid4
+
+from django.conf import settings
+
+from .models import BadWord
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик.
+
+    Строится один раз по списку слов и находит любое из них в тексте
+    за один проход, независимо от длины списка.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [False]
+        for word in words:
+            if word:
+                self._add(word)
+        self._link()
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(False)
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._terminal[state] = True
+
+    def _link(self):
+        """Строит суффиксные ссылки обходом в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._terminal[child] = (
+                    self._terminal[child]
+                    or self._terminal[self._fail[child]]
+                )
+                queue.append(child)
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно слово из списка."""
+        goto, fail, terminal = self._goto, self._fail, self._terminal
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+
+def read_words_file(path):
+    with open(path, encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def file_mtime(path):
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_version(path):
+    try:
+        return Path(path).read_text(encoding='utf-8')
+    except OSError:
+        return None
+
+
+def bump_version():
+    """
+    Заставляет все процессы перестроить автомат при следующей проверке.
+
+    Версия записывается в файл BAD_WORDS_VERSION_FILE: его читают все
+    процессы машины, в отличие от кэша в памяти процесса. Замена
+    файла атомарна, поэтому читатель не увидит его недописанным.
+    """
+    path = Path(settings.BAD_WORDS_VERSION_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    version = uuid4().hex
+    temporary = path.with_name(f'{path.name}.{version}')
+    temporary.write_text(version, encoding='utf-8')
+    os.replace(temporary, path)
+
+
+class BadWords:
+    """
+    Запрещённые слова: встроенный список, файл и таблица BadWord.
+
+    Файл задаётся настройкой BAD_WORDS_FILE и перечитывается при
+    изменении времени модификации. Изменения таблицы отслеживаются по
+    версии в файле BAD_WORDS_VERSION_FILE, её меняют сигналы модели
+    BadWord и команда reload_bad_words. Автомат
+    перестраивается только когда меняется один из источников.
+    """
+
+    def __init__(self, words):
+        self.words = tuple(words)
+        self._lock = Lock()
+        self._signature = None
+        self._matcher = WordMatcher(word.lower() for word in self.words)
+
+    def _current_signature(self):
+        return (
+            file_mtime(settings.BAD_WORDS_FILE),
+            read_version(settings.BAD_WORDS_VERSION_FILE),
+        )
+
+    def _load(self):
+        words = list(self.words)
+        path = settings.BAD_WORDS_FILE
+        if file_mtime(path) is not None:
+            words += read_words_file(path)
+        words += BadWord.objects.values_list('word', flat=True)
+        return WordMatcher(word.lower() for word in words)
+
+    def matcher(self):
+        signature = self._current_signature()
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._matcher = self._load()
+                    self._signature = signature
+        return self._matcher
+
+    def found_in(self, text):
+        return self.matcher().search(text.lower())
@@ -0,0 +1,71 @@
+from hashlib import md5
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import count_cache
+from .pagination import paginate_comments
+
+HOME_VERSION_KEY = 'news:home:version'
+NEWS_VERSION_KEY = 'news:{pk}:version'
+
+
+def get_version(key):
+    """Текущая версия закэшированных данных."""
+    return cache.get_or_set(key, uuid4().hex, None)
+
+
+def home_version():
+    return get_version(HOME_VERSION_KEY)
+
+
+def news_version(pk):
+    return get_version(NEWS_VERSION_KEY.format(pk=pk))
+
+
+def invalidate_news(*pks):
+    """
+    Сбрасывает кэш главной и страниц перечисленных новостей.
+
+    Старые записи не удаляются: новая версия просто меняет ключи,
+    а устаревшие значения вытесняются по таймауту.
+    """
+    keys = [HOME_VERSION_KEY]
+    keys += [NEWS_VERSION_KEY.format(pk=pk) for pk in pks]
+    cache.set_many({key: uuid4().hex for key in keys}, None)
+
+
+def page_key(version, request, params=()):
+    """
+    Ключ закэшированной страницы.
+
+    Из строки запроса берутся только параметры params, от которых
+    зависит страница: иначе произвольные параметры порождали бы
+    сколько угодно копий одной и той же страницы.
+    """
+    query = urlencode([
+        (name, request.GET[name]) for name in params if name in request.GET
+    ])
+    path = f'{request.path}?{query}'
+    return f'news:page:{version}:{md5(path.encode()).hexdigest()}'
+
+
+def comment_page_key(pk, cursor):
+    return f'news:{pk}:comments:{news_version(pk)}:{cursor or ""}'
+
+
+def cached_comment_page(news, cursor):
+    """Страница комментариев новости и курсор следующей страницы."""
+    key = comment_page_key(news.pk, cursor)
+    page = cache.get(key)
+    count_cache('comments', page is not None)
+    if page is None:
+        page = paginate_comments(
+            news.comment_set.select_related('author'),
+            cursor,
+            settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+        )
+        cache.set(key, page, settings.NEWS_CACHE_TIMEOUT)
+    return page
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Кэши, которые не видны другим процессам.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Версии закэшированных страниц должны видеть все процессы."""
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            'Кэш по умолчанию не общий для процессов.',
+            hint=(
+                'Сброс кэша страниц дойдёт только до процесса, который '
+                'записал изменения. Используйте файловый, Redis или '
+                'Memcached кэш.'
+            ),
+            id='news.W001',
+        )
+    ]
@@ -1,6 +1,7 @@
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
+from .bad_words import BadWords
 from .models import Comment
 
 BAD_WORDS = (
@@ -10,6 +11,8 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words = BadWords(BAD_WORDS)
+
 
 class CommentForm(ModelForm):
 
@@ -20,8 +23,13 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if bad_words.found_in(text):
+            raise ValidationError(WARNING)
         return text
+
+
+class QueuedCommentForm(CommentForm):
+    """Форма для очереди модерации: слова проверит обработчик очереди."""
+
+    def clean_text(self):
+        return self.cleaned_data['text']
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from news.models import Comment, News
+from news.streams import FORMATS, open_stream, write_rows
+
+NEWS_FIELDS = ('id', 'title', 'text', 'date')
+COMMENT_FIELDS = ('news', 'author', 'text', 'created')
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает новости (или, с --comments, комментарии '
+        'в формате import_comments) в JSON Lines или CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Путь к файлу или «-».')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--comments', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def news_rows(self, chunk_size):
+        return News.objects.order_by('pk').values(
+            *NEWS_FIELDS
+        ).iterator(chunk_size=chunk_size)
+
+    def comment_rows(self, chunk_size):
+        rows = Comment.objects.order_by('pk').values_list(
+            'news_id', 'author__username', 'text', 'created'
+        ).iterator(chunk_size=chunk_size)
+        for news, author, text, created in rows:
+            yield {
+                'news': news,
+                'author': author,
+                'text': text,
+                'created': created.isoformat(),
+            }
+
+    def handle(self, *args, **options):
+        if options['comments']:
+            fields = COMMENT_FIELDS
+            rows = self.comment_rows(options['chunk_size'])
+        else:
+            fields = NEWS_FIELDS
+            rows = self.news_rows(options['chunk_size'])
+        with open_stream(options['output'], 'w') as file:
+            write_rows(file, options['format'], fields, rows)
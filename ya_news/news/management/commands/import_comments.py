@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from news.caching import invalidate_news
+from news.metrics import count_comment_writes, registry
+from news.models import Comment, News
+from news.pagination import MAX_ID
+from news.signals import comments_created
+from news.streams import FORMATS, chunks, open_stream, read_rows
+
+
+def parse_created(value):
+    created = parse_datetime(value or '')
+    if created is None:
+        return timezone.now()
+    if timezone.is_naive(created):
+        return timezone.make_aware(created)
+    return created
+
+
+def parse_row(row):
+    """
+    Поля строки: (id новости, username, текст, время) или None.
+
+    None означает, что в строке нет нужных полей или их значения
+    некорректны.
+    """
+    try:
+        news_id = int(row['news'])
+        author, text = row['author'], row['text']
+        created = parse_created(row.get('created'))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+    if not (
+        0 < news_id <= MAX_ID
+        and isinstance(author, str)
+        and isinstance(text, str)
+    ):
+        return None
+    return news_id, author, text, created
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает комментарии из JSON Lines или CSV с полями '
+        'news (id новости), author (username), text и created. '
+        'Строки с неизвестной новостью или автором пропускаются, '
+        'некорректные строки пропускаются с сообщением о номере строки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Путь к файлу или «-».')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def build_comments(self, rows):
+        """Разрешает внешние ключи всей пачки двумя запросами."""
+        news_ids = set(News.objects.filter(
+            pk__in={news_id for news_id, _, _, _ in rows}
+        ).values_list('pk', flat=True))
+        authors = dict(get_user_model().objects.filter(
+            username__in={author for _, author, _, _ in rows}
+        ).values_list('username', 'pk'))
+        return [
+            Comment(
+                news_id=news_id,
+                author_id=authors[author],
+                text=text,
+                created=created,
+            )
+            for news_id, author, text, created in rows
+            if news_id in news_ids and author in authors
+        ]
+
+    def parse_chunk(self, chunk):
+        """Разобранные строки пачки; о некорректных пишет в stderr."""
+        rows = []
+        for line, row in chunk:
+            fields = parse_row(row)
+            if fields is None:
+                self.stderr.write(f'Строка {line}: некорректная запись.')
+            else:
+                rows.append(fields)
+        return rows
+
+    def handle(self, *args, **options):
+        imported = skipped = invalid = 0
+        with open_stream(options['input'], 'r') as file:
+            lines = read_rows(file, options['format'])
+            for chunk in chunks(lines, options['chunk_size']):
+                rows = self.parse_chunk(chunk)
+                comments = self.build_comments(rows)
+                with transaction.atomic():
+                    Comment.objects.bulk_create(comments)
+                    news_ids = comments_created(comments)
+                if news_ids:
+                    invalidate_news(*news_ids)
+                count_comment_writes('create', len(comments))
+                imported += len(comments)
+                skipped += len(rows) - len(comments)
+                invalid += len(chunk) - len(rows)
+        registry.flush(force=True)
+        self.stdout.write(
+            f'Загружено: {imported}, пропущено: {skipped}, '
+            f'некорректных: {invalid}'
+        )
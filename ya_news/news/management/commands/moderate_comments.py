@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from news.metrics import registry
+from news.moderation import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь комментариев на модерации.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество потоков-обработчиков.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.COMMENT_MODERATION_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться.',
+        )
+
+    def work(self, batch_size, interval, once):
+        approved = rejected = 0
+        while True:
+            batch_approved, batch_rejected = process_batch(batch_size)
+            approved += batch_approved
+            rejected += batch_rejected
+            if batch_approved or batch_rejected:
+                continue
+            if once:
+                return approved, rejected
+            time.sleep(interval)
+
+    def work_in_thread(self, *args):
+        try:
+            return self.work(*args)
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        work_args = (
+            options['batch_size'], options['interval'], options['once']
+        )
+        if options['workers'] == 1:
+            results = [self.work(*work_args)]
+        else:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                futures = [
+                    executor.submit(self.work_in_thread, *work_args)
+                    for _ in range(options['workers'])
+                ]
+                results = [future.result() for future in futures]
+        registry.flush(force=True)
+        approved = sum(result[0] for result in results)
+        rejected = sum(result[1] for result in results)
+        self.stdout.write(
+            f'Опубликовано: {approved}, отклонено: {rejected}'
+        )
@@ -0,0 +1,50 @@
+from time import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.profiling import build_report, prune, read_samples
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка замеров ProfilingMiddleware по именам URL '
+        'за последние минуты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=60)
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Сколько самых затратных функций показать для страницы.',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Удалить файлы замеров старше выбранного окна.',
+        )
+
+    def handle(self, *args, **options):
+        since = time() - options['minutes'] * 60
+        directory = settings.PROFILING_DIR
+        if options['prune']:
+            prune(directory, since)
+        report = build_report(read_samples(directory, since), options['top'])
+        if not report:
+            self.stdout.write('Замеров нет.')
+        for row in report:
+            templates = row['avg_template_ms']
+            self.stdout.write(
+                f'{row["view"]}: {row["samples"]} замеров, '
+                f'в среднем {row["avg_total_ms"]:.1f} мс, '
+                f'SQL {row["avg_sql_ms"]:.1f} мс '
+                f'({row["avg_queries"]:.1f} запросов), '
+                + (
+                    'шаблоны без cProfile' if templates is None
+                    else f'шаблоны {templates:.1f} мс'
+                )
+            )
+            for name, spent in row['functions']:
+                self.stdout.write(f'    {spent:8.3f} мс  {name}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.models import NewsMonthCount
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает количество новостей по месяцам для архива. '
+        'Нужен после loaddata, bulk_create и других массовых операций.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            months = NewsMonthCount.objects.rebuild()
+        self.stdout.write(f'Месяцев в архиве: {len(months)}')
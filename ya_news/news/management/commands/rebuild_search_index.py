@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from news.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересоздаёт триггеры и заново заполняет полнотекстовые индексы '
+        'новостей и комментариев.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Индекс FTS5 доступен только для SQLite.')
+        rebuild_index()
+        self.stdout.write('Поисковый индекс перестроен.')
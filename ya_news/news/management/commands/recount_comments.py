@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчик комментариев у новостей. '
+        'Нужен после loaddata, bulk_create и других массовых операций '
+        'в обход сигналов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'ids',
+            nargs='*',
+            type=int,
+            help='id новостей; по умолчанию пересчитываются все.',
+        )
+
+    def handle(self, *args, **options):
+        queryset = News.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(pk__in=options['ids'])
+        updated = queryset.recount_comments()
+        self.stdout.write(f'Пересчитано новостей: {updated}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.bad_words import bump_version
+
+
+class Command(BaseCommand):
+    help = (
+        'Сообщает работающим процессам, что список запрещённых слов '
+        'изменился, например после правки таблицы напрямую в БД.'
+    )
+
+    def handle(self, *args, **options):
+        bump_version()
+        self.stdout.write('Список запрещённых слов будет перечитан.')
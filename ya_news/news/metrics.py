@@ -0,0 +1,282 @@
+import asyncio
+import json
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from pathlib import Path
+from threading import Lock
+from time import perf_counter, time
+from uuid import uuid4
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+
+# Границы корзин гистограммы длительности запросов, в секундах.
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf')
+)
+
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Обработанные запросы по имени URL, методу и статусу.'
+    ),
+    'http_request_duration_seconds': (
+        'histogram', 'Длительность обработки запроса по имени URL.'
+    ),
+    'db_queries_total': (
+        'counter', 'SQL-запросы, выполненные при обработке запросов.'
+    ),
+    'cache_requests_total': (
+        'counter', 'Обращения к кэшу страниц: попадания и промахи.'
+    ),
+    'comment_writes_total': (
+        'counter', 'Созданные, изменённые и удалённые комментарии.'
+    ),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{escape(value)}"' for name, value in labels
+    ) + '}'
+
+
+class Registry:
+    """
+    Счётчики и гистограммы процесса.
+
+    Значения копятся в памяти и не чаще раза в METRICS_FLUSH_INTERVAL
+    секунд записываются в свой файл каталога METRICS_DIR. Страница
+    /metrics складывает файлы всех процессов. Без METRICS_DIR
+    отдаются только значения текущего процесса.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """Обнуляет значения процесса и начинает новый файл."""
+        self._pid = os.getpid()
+        self._file_name = f'{self._pid}-{uuid4().hex[:8]}.json'
+        self._values = defaultdict(float)
+        self._flushed = 0
+
+    def _check_fork(self):
+        """После fork дочерний процесс начинает с нуля и со своим файлом."""
+        if os.getpid() != self._pid:
+            self.reset()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            self._values[key] += amount
+
+    def observe(self, name, value, **labels):
+        labels = tuple(sorted(labels.items()))
+        with self._lock:
+            self._check_fork()
+            for bound in DURATION_BUCKETS:
+                key = (f'{name}_bucket', labels + (('le', bound),))
+                self._values[key] += value <= bound
+            self._values[(f'{name}_sum', labels)] += value
+            self._values[(f'{name}_count', labels)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            self._check_fork()
+            return [
+                [name, list(labels), value]
+                for (name, labels), value in self._values.items()
+            ]
+
+    def flush(self, force=False):
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        if not force and time() - self._flushed < (
+            settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        with self._flush_lock:
+            self._flushed = time()
+            snapshot = self.snapshot()
+            directory = Path(directory)
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / self._file_name
+            temporary = path.with_suffix('.tmp')
+            temporary.write_text(json.dumps(snapshot), encoding='utf-8')
+            os.replace(temporary, path)
+
+    def collect(self):
+        """Значения всех процессов, сложенные по имени и меткам."""
+        if not settings.METRICS_DIR:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush(force=True)
+            snapshots = [
+                json.loads(path.read_text(encoding='utf-8'))
+                for path in Path(settings.METRICS_DIR).glob('*.json')
+            ]
+        values = defaultdict(float)
+        for snapshot in snapshots:
+            for name, labels, value in snapshot:
+                values[(name, tuple(map(tuple, labels)))] += value
+        return values
+
+    def render(self):
+        """Текстовый формат Prometheus."""
+        samples = defaultdict(list)
+        for (name, labels), value in sorted(self.collect().items()):
+            family = name
+            for suffix in ('_bucket', '_sum', '_count'):
+                if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                    family = name[:-len(suffix)]
+            labels = tuple(
+                (label, format_value(bound) if label == 'le' else bound)
+                for label, bound in labels
+            )
+            samples[family].append(
+                f'{name}{format_labels(labels)} {format_value(value)}'
+            )
+        lines = []
+        for family, (kind, description) in METRICS.items():
+            lines.append(f'# HELP {family} {description}')
+            lines.append(f'# TYPE {family} {kind}')
+            lines.extend(samples.get(family, ()))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+# Обёртки execute, установленные на время текущего запроса. Переменная
+# контекста переходит в потоки sync_to_async, поэтому через обёртки
+# проходят и запросы к базе из асинхронных представлений.
+query_wrappers = ContextVar('query_wrappers', default=())
+
+
+def run_query_wrappers(execute, sql, params, many, context):
+    for wrapper in reversed(query_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install_query_wrappers(sender, connection, **kwargs):
+    """Подключает обёртки текущего запроса к новому соединению."""
+    if run_query_wrappers not in connection.execute_wrappers:
+        connection.execute_wrappers.append(run_query_wrappers)
+
+
+@contextmanager
+def request_queries(wrapper):
+    """
+    Пропускает SQL-запросы внутри блока через wrapper.
+
+    В отличие от connection.execute_wrapper(), действует на соединения
+    всех потоков, в которые уходит обработка запроса.
+    """
+    token = query_wrappers.set((*query_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        query_wrappers.reset(token)
+
+
+class QueryCounter:
+    """Считает SQL-запросы (для request_queries)."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Число, длительность и SQL-запросы обработанных запросов.
+
+    Middleware работает и в синхронной, и в асинхронной цепочке:
+    под ASGI Django не переводит из-за неё всю цепочку в поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django отличает асинхронный вызов (см. MiddlewareMixin).
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        started = perf_counter()
+        with request_queries(counter):
+            response = self.get_response(request)
+        self.record(request, response, perf_counter() - started, counter)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        started = perf_counter()
+        with request_queries(counter):
+            response = await self.get_response(request)
+        self.record(request, response, perf_counter() - started, counter)
+        return response
+
+    def record(self, request, response, elapsed, counter):
+        match = request.resolver_match
+        view = match.view_name if match else ''
+        registry.inc(
+            'http_requests_total',
+            view=view,
+            method=request.method,
+            status=response.status_code,
+        )
+        registry.observe('http_request_duration_seconds', elapsed, view=view)
+        registry.inc('db_queries_total', counter.queries, view=view)
+        registry.flush()
+
+
+def count_comment_writes(action, amount=1):
+    registry.inc('comment_writes_total', amount, action=action)
+
+
+def count_cache(cache_name, hit):
+    registry.inc(
+        'cache_requests_total',
+        cache=cache_name,
+        result='hit' if hit else 'miss',
+    )
+
+
+@require_safe
+def metrics(request):
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
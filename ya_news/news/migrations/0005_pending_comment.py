@@ -0,0 +1,39 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('news', '0004_badword'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.CreateModel(
+            name='PendingComment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('claimed_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('claimed_by', models.CharField(blank=True, max_length=32)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='news.news')),
+            ],
+            options={
+                'verbose_name': 'Комментарий на модерации',
+                'verbose_name_plural': 'Комментарии на модерации',
+                'ordering': ('id',),
+            },
+        ),
+    ]
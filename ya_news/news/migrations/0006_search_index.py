@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from news.search import drop_index, install_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_pending_comment'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_index, drop_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:14
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def backfill_month_counts(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    NewsMonthCount = apps.get_model('news', 'NewsMonthCount')
+    months = News.objects.order_by().values(
+        year=ExtractYear('date'), month=ExtractMonth('date'),
+    ).annotate(total=Count('pk'))
+    NewsMonthCount.objects.bulk_create(
+        NewsMonthCount(
+            year=month['year'], month=month['month'], count=month['total']
+        )
+        for month in months
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsMonthCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('-year', '-month'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='newsmonthcount',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='news_month_unique'),
+        ),
+        migrations.RunPython(
+            backfill_month_counts, migrations.RunPython.noop
+        ),
+    ]
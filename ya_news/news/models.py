@@ -1,37 +1,186 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def recount_comments(self):
+        """Пересчитывает счётчик комментариев одним запросом."""
+        comments = Comment.objects.filter(
+            news=models.OuterRef('pk')
+        ).order_by().values('news').annotate(
+            total=models.Count('pk')
+        ).values('total')
+        return self.update(
+            comment_count=Coalesce(
+                models.Subquery(comments), 0
+            )
+        )
+
+    def change_comment_count(self, delta):
+        """Атомарно сдвигает счётчик комментариев на delta."""
+        return self.update(comment_count=models.F('comment_count') + delta)
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', 'id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминаем дату из БД, чтобы заметить перенос новости."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_date = instance.__dict__.get('date')
+        return instance
+
+
+class NewsMonthCountQuerySet(models.QuerySet):
+
+    def shift(self, date, delta):
+        """Атомарно сдвигает счётчик новостей за месяц даты."""
+        month = self.filter(year=date.year, month=date.month)
+        if month.update(count=models.F('count') + delta) or delta < 0:
+            return
+        try:
+            with transaction.atomic():
+                self.create(year=date.year, month=date.month, count=delta)
+        except IntegrityError:
+            month.update(count=models.F('count') + delta)
+
+    def rebuild(self):
+        """Пересчитывает все месяцы по таблице новостей."""
+        months = News.objects.order_by().values(
+            year=ExtractYear('date'),
+            month=ExtractMonth('date'),
+        ).annotate(total=models.Count('pk'))
+        self.all().delete()
+        return self.bulk_create(
+            self.model(
+                year=month['year'], month=month['month'], count=month['total']
+            )
+            for month in months
+        )
+
+
+class NewsMonthCount(models.Model):
+    """Количество новостей за месяц для навигации по архиву."""
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    objects = NewsMonthCountQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-year', '-month')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('year', 'month'), name='news_month_unique'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.month:02}.{self.year}: {self.count}'
+
 
 class Comment(models.Model):
+    # Отдельные индексы по внешним ключам не нужны:
+    # их покрывают составные индексы из Meta.
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    # Не auto_now_add: комментарии из очереди модерации и импорта
+    # сохраняют исходное время создания.
+    created = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+            models.Index(
+                fields=('author', 'created'),
+                name='comment_author_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class PendingCommentQuerySet(models.QuerySet):
+
+    def available(self, lease_expired):
+        """Не взятые в работу или брошенные упавшим обработчиком."""
+        return self.filter(
+            models.Q(claimed_at__isnull=True)
+            | models.Q(claimed_at__lt=lease_expired)
+        )
+
+
+class PendingComment(models.Model):
+    """Комментарий в очереди на модерацию."""
+    news = models.ForeignKey(News, on_delete=models.CASCADE)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    text = models.TextField()
+    created = models.DateTimeField(default=timezone.now, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    claimed_by = models.CharField(max_length=32, blank=True)
+
+    objects = PendingCommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name_plural = 'Комментарии на модерации'
+        verbose_name = 'Комментарий на модерации'
+
+    def __str__(self):
+        return self.text[:50]
+
+
+class BadWord(models.Model):
+    """Запрещённое в комментариях слово."""
+    word = models.CharField('Слово', max_length=100, unique=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name_plural = 'Запрещённые слова'
+        verbose_name = 'Запрещённое слово'
+
+    def __str__(self):
+        return self.word
@@ -0,0 +1,150 @@
+import re
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .caching import invalidate_news
+from .forms import bad_words
+from .metrics import count_comment_writes, registry
+from .models import Comment, PendingComment
+from .signals import comments_bulk_changed, comments_created
+from .streams import chunks
+
+# Сколько id комментариев передавать в одном IN (...) при удалении.
+DELETE_BATCH_SIZE = 500
+MAX_LENGTH = 2000
+MAX_LINKS = 3
+LINK = re.compile(r'https?://', re.IGNORECASE)
+REPEATED_CHARS = re.compile(r'(.)\1{9,}')
+
+
+def rejection_reason(text):
+    """Причина отклонения комментария или None, если он допустим."""
+    if bad_words.found_in(text):
+        return 'bad words'
+    if len(text) > MAX_LENGTH:
+        return 'too long'
+    if len(LINK.findall(text)) > MAX_LINKS:
+        return 'too many links'
+    if REPEATED_CHARS.search(text):
+        return 'repeated characters'
+    return None
+
+
+def enqueue(news, author, text):
+    return PendingComment.objects.create(news=news, author=author, text=text)
+
+
+def claim_batch(size):
+    """
+    Забирает из очереди до size комментариев.
+
+    Выборка и отметка делаются одним UPDATE с подзапросом: два
+    обработчика не возьмут одну запись, а SQLite не придётся повышать
+    блокировку с чтения до записи внутри транзакции.
+    """
+    now = timezone.now()
+    lease_expired = now - timedelta(
+        seconds=settings.COMMENT_MODERATION_LEASE
+    )
+    token = uuid4().hex
+    available = PendingComment.objects.available(lease_expired)
+    PendingComment.objects.filter(
+        pk__in=available.values('pk')[:size]
+    ).update(claimed_at=now, claimed_by=token)
+    return list(PendingComment.objects.filter(claimed_by=token))
+
+
+def process_batch(size):
+    """
+    Модерирует одну пачку комментариев из очереди.
+
+    Одобренные комментарии публикуются одним bulk_create, вся пачка
+    удаляется из очереди в той же транзакции. Если аренда истекла
+    и часть записей забрал другой обработчик, они пропускаются:
+    их опубликует он. Возвращает пару (опубликовано, отклонено).
+    """
+    batch = claim_batch(size)
+    if not batch:
+        return 0, 0
+    token = batch[0].claimed_by
+    accepted = {
+        pending.pk: rejection_reason(pending.text) is None
+        for pending in batch
+    }
+    claimed = PendingComment.objects.filter(
+        pk__in=list(accepted), claimed_by=token
+    )
+    with transaction.atomic():
+        # UPDATE сразу берёт блокировку записи, поэтому до конца
+        # транзакции другой обработчик не заберёт оставшиеся записи.
+        claimed.update(claimed_at=timezone.now())
+        owned = set(claimed.values_list('pk', flat=True))
+        approved = [
+            Comment(
+                news_id=pending.news_id,
+                author_id=pending.author_id,
+                text=pending.text,
+                created=pending.created,
+            )
+            for pending in batch
+            if pending.pk in owned and accepted[pending.pk]
+        ]
+        Comment.objects.bulk_create(approved)
+        news_ids = comments_created(approved)
+        claimed.delete()
+    if news_ids:
+        invalidate_news(*news_ids)
+    count_comment_writes('create', len(approved))
+    registry.flush()
+    return len(approved), len(owned) - len(approved)
+
+
+def delete_comments(queryset):
+    """
+    Удаляет комментарии без загрузки объектов.
+
+    id выбираются пачками по DELETE_BATCH_SIZE и удаляются одним
+    DELETE ... WHERE id IN (...) на пачку. Сигналы для каждого
+    комментария не отправляются: счётчики и кэш новостей обновляются
+    одним пересчётом. Возвращает число удалённых.
+    """
+    queryset = queryset.order_by()
+    news_ids = set(queryset.values_list('news_id', flat=True).distinct())
+    ids = queryset.values_list('pk', flat=True)
+    table = connection.ops.quote_name(Comment._meta.db_table)
+    deleted = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        batch = list(ids[:DELETE_BATCH_SIZE])
+        while batch:
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {table} WHERE id IN ({placeholders})', batch
+            )
+            deleted += cursor.rowcount
+            batch = list(ids[:DELETE_BATCH_SIZE])
+    comments_bulk_changed(news_ids)
+    count_comment_writes('delete', deleted)
+    return deleted
+
+
+def delete_bad_comments(queryset):
+    """
+    Повторно проверяет комментарии на запрещённые слова.
+
+    Тексты читаются порциями без создания объектов, нарушители
+    удаляются пачками через delete_comments. Возвращает число удалённых.
+    """
+    rejected = (
+        pk for pk, text in queryset.order_by().values_list(
+            'pk', 'text'
+        ).iterator()
+        if bad_words.found_in(text)
+    )
+    return sum(
+        delete_comments(Comment.objects.filter(pk__in=batch))
+        for batch in chunks(rejected, DELETE_BATCH_SIZE)
+    )
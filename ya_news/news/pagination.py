@@ -0,0 +1,70 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import Http404
+
+CURSOR_SEPARATOR = '|'
+# Наибольший id, который помещается в целое SQLite.
+MAX_ID = 2 ** 63 - 1
+
+
+def make_cursor(created, pk):
+    raw = f'{created.isoformat()}{CURSOR_SEPARATOR}{pk}'
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def encode_cursor(comment):
+    """Курсор указывает на последний комментарий страницы."""
+    return make_cursor(comment.created, comment.pk)
+
+
+def cursor_before(comment):
+    """
+    Курсор страницы, которая начинается с комментария comment.
+
+    Строится по времени создания без id: подходит и для комментария,
+    записанного через bulk_create, у которого id неизвестен.
+    """
+    return make_cursor(comment.created, 0)
+
+
+def decode_cursor(cursor):
+    """
+    Возвращает пару (created, id) или бросает Http404.
+
+    Время должно быть с часовым поясом, id — от 0 (курсор cursor_before)
+    до MAX_ID: большее число SQLite не примет в параметре запроса.
+    """
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        raw = urlsafe_b64decode(cursor + padding).decode()
+        created, pk = raw.split(CURSOR_SEPARATOR)
+        created, pk = datetime.fromisoformat(created), int(pk)
+    except (DecodeError, UnicodeDecodeError, ValueError):
+        raise Http404('Некорректный курсор.')
+    if created.tzinfo is None or not 0 <= pk <= MAX_ID:
+        raise Http404('Некорректный курсор.')
+    return created, pk
+
+
+def paginate_comments(queryset, cursor, page_size):
+    """
+    Keyset-пагинация комментариев по (created, id).
+
+    Возвращает комментарии страницы и курсор следующей страницы
+    (None, если страница последняя).
+    """
+    queryset = queryset.order_by('created', 'pk')
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    comments = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(comments) > page_size:
+        comments = comments[:page_size]
+        next_cursor = encode_cursor(comments[-1])
+    return comments, next_cursor
@@ -0,0 +1,227 @@
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter, time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.base import Template
+
+from .metrics import request_queries
+
+# Файлы замеров делятся по часам, чтобы старые было легко удалять.
+FILE_NAME = '{hour}-{pid}.jsonl'
+HOUR_FORMAT = '%Y%m%d%H'
+# Адреса в именах встроенных функций разные в каждом процессе.
+ADDRESS = re.compile(r' at 0x[0-9a-f]+')
+
+# Ключ Template.render в статистике cProfile: его суммарное время —
+# время отрисовки шаблона вместе с вложенными.
+TEMPLATE_RENDER = (
+    Template.render.__code__.co_filename,
+    Template.render.__code__.co_firstlineno,
+    Template.render.__code__.co_name,
+)
+
+
+class SQLTimer:
+    """Считает запросы и их суммарное время (для request_queries)."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += perf_counter() - started
+
+
+def function_label(key):
+    filename, line, name = key
+    for root in (str(settings.BASE_DIR), 'site-packages'):
+        filename = filename.rsplit(root + os.sep, 1)[-1]
+    return f'{filename}:{line}({ADDRESS.sub("", name)})'
+
+
+def profile_summary(profile, top):
+    """Время отрисовки шаблонов и самые затратные функции, в мс."""
+    stats = pstats.Stats(profile).stats
+    template = stats.get(TEMPLATE_RENDER)
+    hottest = sorted(
+        stats.items(), key=lambda item: item[1][2], reverse=True
+    )[:top]
+    return (
+        template[3] * 1000 if template else 0,
+        {
+            function_label(key): round(row[2] * 1000, 3)
+            for key, row in hottest
+        },
+    )
+
+
+def write_sample(sample):
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = FILE_NAME.format(
+        hour=datetime.fromtimestamp(sample['time']).strftime(HOUR_FORMAT),
+        pid=os.getpid(),
+    )
+    with open(directory / name, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(sample, ensure_ascii=False) + '\n')
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует случайную долю запросов.
+
+    Доля задаётся настройкой PROFILING_SAMPLE_RATE; при нуле middleware
+    отключается целиком. Для выбранного запроса записываются общее
+    время, число и время SQL-запросов, время отрисовки шаблонов и самые
+    затратные функции по cProfile. Под профилировщиком запрос идёт
+    медленнее, поэтому важны доли, а не абсолютные значения.
+    Замеры дописываются в файлы каталога PROFILING_DIR, сводку по ним
+    строит команда profiling_report.
+
+    Под ASGI middleware остаётся в асинхронной цепочке. cProfile видит
+    только свой поток, а асинхронный запрос делит цикл событий с чужими
+    и уходит в потоки sync_to_async, поэтому для него записываются
+    только время и SQL, без шаблонов и функций.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django отличает асинхронный вызов (см. MiddlewareMixin).
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = cProfile.Profile()
+        timer = SQLTimer()
+        started = perf_counter()
+        with request_queries(timer):
+            profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.disable()
+        self.record(
+            request, response, perf_counter() - started, timer, profile
+        )
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return await self.get_response(request)
+        timer = SQLTimer()
+        started = perf_counter()
+        with request_queries(timer):
+            response = await self.get_response(request)
+        self.record(request, response, perf_counter() - started, timer)
+        return response
+
+    def record(self, request, response, elapsed, timer, profile=None):
+        template_ms, functions = None, {}
+        if profile is not None:
+            template_ms, functions = profile_summary(
+                profile, settings.PROFILING_TOP_FUNCTIONS
+            )
+            template_ms = round(template_ms, 3)
+        match = request.resolver_match
+        write_sample({
+            'time': time(),
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(elapsed * 1000, 3),
+            'sql_ms': round(timer.seconds * 1000, 3),
+            'queries': timer.queries,
+            'template_ms': template_ms,
+            'functions': functions,
+        })
+
+
+def sample_files(directory, since):
+    """Файлы замеров, в которых могут быть записи не старше since."""
+    oldest = datetime.fromtimestamp(since).strftime(HOUR_FORMAT)
+    for path in sorted(Path(directory).glob('*.jsonl')):
+        if path.name.split('-')[0] >= oldest:
+            yield path
+
+
+def read_samples(directory, since):
+    for path in sample_files(directory, since):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                sample = json.loads(line)
+                if sample['time'] >= since:
+                    yield sample
+
+
+def prune(directory, since):
+    """Удаляет файлы, все записи которых старше since."""
+    recent = set(sample_files(directory, since))
+    for path in Path(directory).glob('*.jsonl'):
+        if path not in recent:
+            path.unlink()
+
+
+def build_report(samples, top=10):
+    """
+    Сводка по именам URL, начиная с самых затратных в сумме.
+
+    Для каждого имени — число замеров, средние времена и функции,
+    на которые пришлось больше всего собственного времени. Шаблоны
+    и функции усредняются только по замерам с cProfile; если таких
+    нет, среднее время шаблонов — None.
+    """
+    groups = defaultdict(list)
+    for sample in samples:
+        groups[sample['view'] or '<не найден>'].append(sample)
+    report = []
+    for view, group in groups.items():
+        profiled = [
+            sample for sample in group if sample['template_ms'] is not None
+        ]
+        functions = Counter()
+        for sample in profiled:
+            functions.update(sample['functions'])
+        total = sum(sample['total_ms'] for sample in group)
+        report.append({
+            'view': view,
+            'samples': len(group),
+            'total_ms': total,
+            **{
+                f'avg_{field}': sum(sample[field] for sample in group)
+                / len(group)
+                for field in ('total_ms', 'sql_ms', 'queries')
+            },
+            'avg_template_ms': (
+                sum(sample['template_ms'] for sample in profiled)
+                / len(profiled) if profiled else None
+            ),
+            'functions': [
+                (name, spent / len(profiled))
+                for name, spent in functions.most_common(top)
+            ],
+        })
+    return sorted(report, key=lambda row: row['total_ms'], reverse=True)
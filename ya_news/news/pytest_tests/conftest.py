@@ -1,22 +1,147 @@
+import subprocess
+import sys
+from collections import namedtuple
+from contextlib import contextmanager
 from datetime import timedelta
+from textwrap import indent
+from time import perf_counter
 
 import pytest
 from django.conf import settings
+from django.db import connection
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
 from news.models import Comment, News
+from news.ratelimit import get_backend
 
 COMMENT_TEXT = 'Текст комментария'
 NEW_COMMENT_TEXT = 'Новый текст'
 
+QueryBudget = namedtuple('QueryBudget', ('queries', 'sql_ms'))
+
+
+class QueryTimer:
+    """Суммирует время выполнения запросов (для execute_wrapper)."""
+
+    def __init__(self):
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += perf_counter() - started
+
+
+# Бюджеты страниц из reverse_url: сколько запросов и миллисекунд SQL
+# допускается при первом, ещё не закэшированном открытии страницы
+# автором комментария. Число запросов не должно зависеть от количества
+# новостей и комментариев.
+QUERY_BUDGETS = {
+    'news:home': QueryBudget(3, 50),
+    'news:detail': QueryBudget(4, 50),
+    'news:search': QueryBudget(2, 50),
+    'news:archive': QueryBudget(3, 50),
+    'news:edit': QueryBudget(3, 50),
+    'news:delete': QueryBudget(3, 50),
+    'users:login': QueryBudget(2, 50),
+    'users:logout': QueryBudget(4, 50),
+    'users:signup': QueryBudget(2, 50),
+}
+
+# Бюджеты записи комментариев автором: POST на страницу из reverse_url.
+# Объект загружается один раз, вместе с новостью; в бюджет входит
+# загрузка запрещённых слов при первой проверке текста.
+WRITE_QUERY_BUDGETS = {
+    'news:detail': QueryBudget(6, 50),
+    'news:edit': QueryBudget(5, 50),
+    'news:delete': QueryBudget(5, 50),
+}
+
 
 @pytest.fixture(autouse=True)
 def enable_db_access_for_all_tests(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache(settings, tmp_path):
+    """
+    Кэш и версия запрещённых слов во временном каталоге теста.
+
+    Настройки проекта указывают на общий каталог машины, и тесты
+    не должны трогать кэш запущенного там сайта.
+    """
+    settings.CACHES = {
+        'default': {
+            **settings.CACHES['default'],
+            'LOCATION': str(tmp_path / 'cache'),
+        }
+    }
+    settings.BAD_WORDS_VERSION_FILE = str(tmp_path / 'bad-words.version')
+
+
+@pytest.fixture
+def run_in_process(settings):
+    """
+    Выполняет код в оболочке manage.py в отдельном процессе.
+
+    Процесс видит те же кэш и версию запрещённых слов, что и тест.
+    """
+    def run(code):
+        overrides = {
+            'CACHES': settings.CACHES,
+            'BAD_WORDS_VERSION_FILE': settings.BAD_WORDS_VERSION_FILE,
+        }
+        script = (
+            'from django.test.utils import override_settings\n'
+            f'with override_settings(**{overrides!r}):\n'
+            + indent(code, '    ')
+        )
+        subprocess.run(
+            [sys.executable, 'manage.py', 'shell', '-c', script],
+            cwd=settings.BASE_DIR,
+            check=True,
+            capture_output=True,
+        )
+    return run
+
+
+@pytest.fixture(autouse=True)
+def reset_ratelimits():
+    get_backend().reset()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Проверяет, что запросы внутри блока укладываются в бюджет страницы.
+
+        with query_budget('news:home'):
+            client.get(url)
+    """
+    @contextmanager
+    def check(name, budgets=QUERY_BUDGETS):
+        budget = budgets[name]
+        timer = QueryTimer()
+        with CaptureQueriesContext(connection) as context:
+            with connection.execute_wrapper(timer):
+                yield context
+        queries = context.captured_queries
+        sql_ms = timer.seconds * 1000
+        if len(queries) > budget.queries or sql_ms > budget.sql_ms:
+            pytest.fail(
+                f'{name}: {len(queries)} запросов за {sql_ms:.1f} мс, '
+                f'бюджет {budget.queries} запросов за {budget.sql_ms} мс:\n'
+                + '\n'.join(query['sql'] for query in queries)
+            )
+    return check
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Автор')
@@ -95,6 +220,9 @@ def comment(news, author):
 def reverse_url(comment):
     return {
         'news:home': reverse('news:home'),
+        'news:detail': reverse('news:detail', args=(comment.news_id,)),
+        'news:search': reverse('news:search'),
+        'news:archive': reverse('news:archive'),
         'users:login': reverse('users:login'),
         'users:logout': reverse('users:logout'),
         'users:signup': reverse('users:signup'),
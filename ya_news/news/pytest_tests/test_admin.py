@@ -0,0 +1,93 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news import moderation
+from news.forms import BAD_WORDS
+from news.models import Comment, News
+
+CHANGELIST = 'admin:news_comment_changelist'
+
+
+def run_action(admin_client, action, comments):
+    return admin_client.post(reverse(CHANGELIST), {
+        'action': action,
+        '_selected_action': [comment.pk for comment in comments],
+    })
+
+
+def test_comment_changelist_queries_do_not_grow(
+    admin_client, django_assert_max_num_queries, author, news,
+    comments_order_check
+):
+    url = reverse(CHANGELIST)
+    admin_client.get(url)
+    with django_assert_max_num_queries(8):
+        response = admin_client.get(url)
+    assert len(response.context['cl'].result_list) == 10
+
+
+def test_news_admin_links_to_comment_list(admin_client, comment):
+    response = admin_client.get(
+        reverse('admin:news_news_change', args=(comment.news_id,))
+    )
+    assert not response.context['inline_admin_formsets']
+    link = f'?news__id__exact={comment.news_id}'
+    response = admin_client.get(reverse('admin:news_news_changelist'))
+    assert link in response.content.decode()
+    response = admin_client.get(reverse(CHANGELIST) + link)
+    assert list(response.context['cl'].result_list) == [comment]
+
+
+def test_delete_action_is_set_based(admin_client, news, comments_order_check):
+    comments = list(Comment.objects.all()[:3])
+    with CaptureQueriesContext(connection) as context:
+        run_action(admin_client, 'delete_comments', comments)
+    deletes = [
+        query for query in context.captured_queries
+        if query['sql'].startswith('DELETE FROM "news_comment"')
+    ]
+    assert len(deletes) == 1
+    assert Comment.objects.count() == 7
+    news.refresh_from_db()
+    assert news.comment_count == 7
+
+
+def test_bad_words_action_deletes_only_offenders(
+    admin_client, news, author, comment
+):
+    bad = Comment.objects.create(
+        news=news, author=author, text=f'Ты {BAD_WORDS[0]}!'
+    )
+    run_action(admin_client, 'delete_bad_comments', [comment, bad])
+    assert list(Comment.objects.all()) == [comment]
+    assert News.objects.get().comment_count == 1
+
+
+def test_delete_comments_in_batches(monkeypatch, news, comments_order_check):
+    monkeypatch.setattr(moderation, 'DELETE_BATCH_SIZE', 4)
+    with CaptureQueriesContext(connection) as context:
+        deleted = moderation.delete_comments(Comment.objects.all())
+    deletes = [
+        query for query in context.captured_queries
+        if query['sql'].startswith('DELETE FROM "news_comment"')
+    ]
+    assert (deleted, len(deletes)) == (10, 3)
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_comment_cannot_move_to_other_news(admin_client, comment, author):
+    other = News.objects.create(title='Другая новость', text='Текст')
+    url = reverse('admin:news_comment_change', args=(comment.pk,))
+    response = admin_client.get(url)
+    assert 'news' not in response.context['adminform'].form.fields
+    admin_client.post(url, {
+        'news': other.pk,
+        'author': author.pk,
+        'text': comment.text,
+    })
+    comment.refresh_from_db()
+    assert comment.news_id != other.pk
+    counts = dict(News.objects.values_list('pk', 'comment_count'))
+    assert counts == {comment.news_id: 1, other.pk: 0}
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+from time import time
+
+import pytest
+from django.urls import reverse
+from django.utils.http import http_date
+
+from news.models import Comment
+
+NEW_COMMENT_TEXT = 'Новый комментарий'
+
+
+@pytest.fixture
+def api_urls(news):
+    return {
+        'news:api_list': reverse('news:api_list'),
+        'news:api_detail': reverse('news:api_detail', args=(news.id,)),
+        'news:api_comments': reverse('news:api_comments', args=(news.id,)),
+    }
+
+
+def test_news_detail(client, news, comment, api_urls):
+    data = client.get(api_urls['news:api_detail']).json()
+    assert data['id'] == news.id
+    assert data['title'] == news.title
+    assert data['comment_count'] == 1
+
+
+def test_news_list_paginated(client, settings, news_order_check, api_urls):
+    settings.NEWS_COUNT_ON_HOME_PAGE = 5
+    data = client.get(api_urls['news:api_list']).json()
+    assert data['count'] == 12
+    ids = [item['id'] for item in data['results']]
+    while data['next']:
+        data = client.get(data['next']).json()
+        ids += [item['id'] for item in data['results']]
+    assert len(set(ids)) == 12
+
+
+def test_comments_follow_cursor(
+    client, settings, comments_order_check, news, api_urls
+):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 3
+    data = client.get(api_urls['news:api_comments']).json()
+    texts = [item['text'] for item in data['results']]
+    while data['next']:
+        data = client.get(data['next']).json()
+        texts += [item['text'] for item in data['results']]
+    assert texts == list(
+        news.comment_set.order_by('created', 'pk').values_list(
+            'text', flat=True
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    'name', ('news:api_list', 'news:api_detail', 'news:api_comments')
+)
+def test_conditional_get(client, author, news, comment, api_urls, name):
+    url = api_urls[name]
+    response = client.get(url)
+    assert not response.has_header('Last-Modified')
+    etag = response['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.content
+    Comment.objects.create(news=news, author=author, text=NEW_COMMENT_TEXT)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize('name', ('news:api_list', 'news:api_detail'))
+def test_if_modified_since_alone_not_trusted(
+    client, news, comment, api_urls, name
+):
+    response = client.get(
+        api_urls[name], HTTP_IF_MODIFIED_SINCE=http_date(time() + 3600)
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize(
+    'name', ('news:api_list', 'news:api_detail', 'news:api_comments')
+)
+def test_not_modified_without_queries(
+    client, django_assert_num_queries, comment, api_urls, name
+):
+    etag = client.get(api_urls[name])['ETag']
+    with django_assert_num_queries(0):
+        response = client.get(api_urls[name], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_list_etag_follows_news_changes(client, news, api_urls):
+    etag = client.get(api_urls['news:api_list'])['ETag']
+    news.title = 'Новый заголовок'
+    news.save()
+    response = client.get(api_urls['news:api_list'], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
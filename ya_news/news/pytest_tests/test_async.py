@@ -0,0 +1,46 @@
+from importlib import import_module
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+
+from news import async_views
+
+
+def make_request(rf, url, client=None):
+    """Запрос с сессией клиента, как после SessionMiddleware."""
+    request = rf.get(url)
+    if client is not None:
+        key = client.cookies[settings.SESSION_COOKIE_NAME].value
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = key
+        request.session = import_module(
+            settings.SESSION_ENGINE
+        ).SessionStore(key)
+    return request
+
+
+def test_async_pages_match_sync(
+    rf, client, django_assert_num_queries, comment, news_detail_url,
+    reverse_url
+):
+    pages = (
+        (async_views.news_list, reverse_url['news:home'], {}),
+        (async_views.news_detail, news_detail_url, {'pk': comment.news_id}),
+    )
+    for view, url, kwargs in pages:
+        expected = client.get(url).content
+        response = async_to_sync(view)(make_request(rf, url), **kwargs)
+        assert response.content == expected
+        with django_assert_num_queries(0):
+            response = async_to_sync(view)(make_request(rf, url), **kwargs)
+        assert response.content == expected
+
+
+def test_async_detail_for_authorized_user(
+    rf, author_client, comment, news_detail_url, reverse_url
+):
+    response = async_to_sync(async_views.news_detail)(
+        make_request(rf, news_detail_url, author_client), pk=comment.news_id
+    )
+    content = response.content.decode()
+    assert reverse_url['news:edit'] in content
+    assert 'Оставить комментарий' in content
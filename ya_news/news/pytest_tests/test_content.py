@@ -1,6 +1,16 @@
+from base64 import urlsafe_b64encode
+from http import HTTPStatus
+from pathlib import Path
+from tempfile import gettempdir
+
+import pytest
 from django.conf import settings
+from django.core.checks import run_checks
+from django.urls import reverse
 
+from news.caching import news_version
 from news.forms import CommentForm
+from news.pagination import MAX_ID
 
 
 def test_news_count(client, news_order_check, reverse_url):
@@ -36,3 +46,140 @@ def test_authorized_client_has_form(author_client, news_detail_url):
     response = author_client.get(news_detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+def test_comments_paginated_by_cursor(
+    client, settings, comments_order_check, news, news_detail_url
+):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 4
+    seen = []
+    cursor = None
+    while True:
+        data = {'cursor': cursor} if cursor else {}
+        response = client.get(news_detail_url, data)
+        page = response.context['comments']
+        assert len(page) <= settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+        seen.extend(page)
+        cursor = response.context['next_cursor']
+        if cursor is None:
+            break
+    assert seen == list(news.comment_set.order_by('created', 'pk'))
+
+
+@pytest.mark.parametrize('raw', (
+    None,
+    f'2020-01-01T00:00:00+00:00|{MAX_ID + 1}',
+    '2020-01-01T00:00:00+00:00|-1',
+    '2020-01-01T00:00:00|1',
+))
+def test_invalid_cursor_returns_404(client, news, news_detail_url, raw):
+    cursor = 'не-курсор' if raw is None else urlsafe_b64encode(
+        raw.encode()
+    ).decode()
+    api_url = reverse('news:api_comments', args=(news.pk,))
+    for url in (news_detail_url, api_url):
+        response = client.get(url, {'cursor': cursor})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_anonymous_pages_served_from_cache(
+    client, django_assert_num_queries, comment, news_detail_url, reverse_url
+):
+    for url in (reverse_url['news:home'], news_detail_url):
+        first = client.get(url)
+        with django_assert_num_queries(0):
+            second = client.get(url)
+        assert second.content == first.content
+
+
+def test_cache_invalidated_on_comment_change(
+    client, author_client, comment, news_detail_url, reverse_url
+):
+    client.get(news_detail_url)
+    author_client.post(reverse_url['news:edit'], data={'text': 'Правка'})
+    response = client.get(news_detail_url)
+    assert 'Правка' in response.content.decode()
+    author_client.post(news_detail_url, data={'text': 'Ещё один'})
+    response = client.get(news_detail_url)
+    assert 'Ещё один' in response.content.decode()
+
+
+def test_cache_invalidated_from_another_process(
+    client, news_detail_url, news, run_in_process
+):
+    client.get(news_detail_url)
+    version = news_version(news.pk)
+    run_in_process(
+        'from news.caching import invalidate_news\n'
+        f'invalidate_news({news.pk})'
+    )
+    assert news_version(news.pk) != version
+
+
+def test_tests_use_own_cache(settings, tmp_path):
+    location = settings.CACHES['default']['LOCATION']
+    assert location == str(tmp_path / 'cache')
+    assert location != str(Path(gettempdir()) / 'yanews-cache')
+
+
+def test_page_cache_ignores_unused_parameters(
+    client, django_assert_num_queries, comment, news_detail_url
+):
+    client.get(news_detail_url)
+    with django_assert_num_queries(0):
+        response = client.get(news_detail_url, {'utm_source': 'рассылка'})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_process_local_cache_reported(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    assert 'news.W001' in [message.id for message in run_checks()]
+
+
+def test_authorized_user_gets_personal_links(
+    client, author_client, comment, news_detail_url, reverse_url
+):
+    client.get(news_detail_url)
+    response = author_client.get(news_detail_url)
+    assert reverse_url['news:edit'] in response.content.decode()
+    response = client.get(news_detail_url)
+    assert reverse_url['news:edit'] not in response.content.decode()
+
+
+def search(client, url, query, **params):
+    response = client.get(url, {'q': query, **params})
+    return list(response.context['object_list'])
+
+
+def test_search_by_news_and_comments(client, news, comment, reverse_url):
+    url = reverse_url['news:search']
+    assert search(client, url, 'новост') == [news]
+    assert search(client, url, 'комментария') == []
+    assert search(client, url, 'комментария', comments=1) == [news]
+    comment.delete()
+    assert search(client, url, 'комментария', comments=1) == []
+
+
+def test_search_paginated(client, news_order_check, reverse_url):
+    response = client.get(reverse_url['news:search'], {'q': 'текст'})
+    page = response.context['page_obj']
+    assert page.paginator.count == settings.NEWS_COUNT_ON_HOME_PAGE + 2
+    assert len(page.object_list) == settings.NEWS_COUNT_ON_HOME_PAGE
+
+
+def test_archive_pages(client, news):
+    year, month, day = news.date.year, news.date.month, news.date.day
+    response = client.get(reverse('news:archive_year', args=(year,)))
+    assert [item.month for item in response.context['months']] == [month]
+    for url in (
+        reverse('news:archive_month', args=(year, month)),
+        reverse('news:archive_day', args=(year, month, day)),
+    ):
+        response = client.get(url)
+        assert list(response.context['object_list']) == [news]
+    response = client.get(reverse('news:archive_year', args=(year - 1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -1,9 +1,31 @@
+import asyncio
+from datetime import date, timedelta
 from http import HTTPStatus
+from io import StringIO
+from threading import Thread
+from unittest.mock import patch
+from urllib.parse import urlencode
 
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from pytest_django.asserts import assertRedirects
 
+from news import moderation
+from news.bad_words import bump_version, read_version
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.models import (
+    BadWord, Comment, News, NewsMonthCount, PendingComment
+)
+from news.pagination import cursor_before
+from news.profiling import ProfilingMiddleware
+from news.ratelimit import LocalBackend, SQLiteBackend, client_ip
+from news.write_buffer import CommentWriteBuffer
 
 COMMENT_TEXT = 'Текст комментария'
 NEW_COMMENT_TEXT = 'Новый текст'
@@ -26,15 +48,40 @@ def test_user_can_create_comment(
     Comment.objects.all().delete()
     form_data = {'text': COMMENT_TEXT}
     response = author_client.post(news_detail_url, data=form_data)
-    assertRedirects(response, f'{news_detail_url}#comments')
     comments_count = Comment.objects.count()
     assert comments_count == 1
     comment = Comment.objects.get()
+    assertRedirects(
+        response,
+        f'{news_detail_url}?cursor={cursor_before(comment)}#comments',
+    )
     assert comment.text == COMMENT_TEXT
     assert comment.news == news
     assert comment.author == author
 
 
+def test_new_comment_visible_after_redirect(
+    author_client, author, news, news_detail_url, settings
+):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 3
+    now = timezone.now()
+    Comment.objects.bulk_create(
+        Comment(
+            news=news,
+            author=author,
+            text=f'Старый комментарий {index}',
+            created=now - timedelta(days=index + 1),
+        )
+        for index in range(10)
+    )
+    response = author_client.post(
+        news_detail_url, data={'text': COMMENT_TEXT}, follow=True
+    )
+    assert COMMENT_TEXT in [
+        comment.text for comment in response.context['comments']
+    ]
+
+
 def test_user_cant_use_bad_words(author_client, news_detail_url):
     comments_count_initial = Comment.objects.count()
     bad_words_data = {'text': f'Какой-то текст, {BAD_WORDS[0]}, еще текст'}
@@ -54,7 +101,9 @@ def test_author_can_edit_comment(
 ):
     form_data = {'text': NEW_COMMENT_TEXT}
     response = author_client.post(reverse_url['news:edit'], data=form_data)
-    url_to_comments = news_detail_url + '#comments'
+    url_to_comments = (
+        f'{news_detail_url}?cursor={cursor_before(comment)}#comments'
+    )
     assertRedirects(response, url_to_comments)
     updated_comment = Comment.objects.get(id=comment.id)
     assert updated_comment.text == form_data['text']
@@ -74,3 +123,418 @@ def test_user_cant_edit_comment_of_another_user(
     assert updated_comment.text == COMMENT_TEXT
     assert updated_comment.author == comment.author
     assert updated_comment.news == comment.news
+
+
+def test_comment_count_follows_create_and_delete(
+    author_client,
+    news,
+    news_detail_url,
+    reverse_url,
+):
+    author_client.post(news_detail_url, data={'text': COMMENT_TEXT})
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    author_client.post(reverse_url['news:delete'])
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_recount_comments_command(news, comment):
+    News.objects.update(comment_count=0)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
+
+
+def test_bad_words_from_table_and_file(
+    author_client, news_detail_url, settings, tmp_path,
+    django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        BadWord.objects.create(word='Болван')
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('бездельник\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = words_file
+    comments_count_initial = Comment.objects.count()
+    for text in ('Ты болван!', 'Сам бездельник'):
+        response = author_client.post(news_detail_url, data={'text': text})
+        assert WARNING in response.context['form'].errors['text']
+    assert Comment.objects.count() == comments_count_initial
+
+
+def test_bad_words_version_bumped_after_commit(
+    settings, django_capture_on_commit_callbacks
+):
+    version = read_version(settings.BAD_WORDS_VERSION_FILE)
+    with django_capture_on_commit_callbacks() as callbacks:
+        BadWord.objects.create(word='болван')
+    assert read_version(settings.BAD_WORDS_VERSION_FILE) == version
+    assert callbacks == [bump_version]
+    callbacks[0]()
+    assert read_version(settings.BAD_WORDS_VERSION_FILE) != version
+
+
+def test_bad_words_reloaded_from_another_process(
+    author_client, news_detail_url, run_in_process
+):
+    author_client.post(news_detail_url, data={'text': 'Ты болван!'})
+    BadWord.objects.bulk_create([BadWord(word='болван')])
+    run_in_process(
+        'from django.core.management import call_command\n'
+        "call_command('reload_bad_words')"
+    )
+    response = author_client.post(
+        news_detail_url, data={'text': 'Ты болван!'}
+    )
+    assert WARNING in response.context['form'].errors['text']
+
+
+def test_async_moderation_publishes_after_processing(
+    author_client, author, news, news_detail_url, settings
+):
+    settings.COMMENT_MODERATION_ASYNC = True
+    Comment.objects.all().delete()
+    response = author_client.post(
+        news_detail_url, data={'text': COMMENT_TEXT}
+    )
+    assertRedirects(response, f'{news_detail_url}#comments')
+    author_client.post(
+        news_detail_url, data={'text': f'Ах ты {BAD_WORDS[0]}'}
+    )
+    assert Comment.objects.count() == 0
+    assert PendingComment.objects.count() == 2
+    call_command('moderate_comments', '--once', stdout=StringIO())
+    assert PendingComment.objects.count() == 0
+    comment = Comment.objects.get()
+    assert comment.text == COMMENT_TEXT
+    assert comment.author == author
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_moderation_skips_rows_claimed_by_another_worker(
+    monkeypatch, author, news
+):
+    for text in ('Первый', 'Второй'):
+        moderation.enqueue(news, author, text)
+    rejection_reason = moderation.rejection_reason
+
+    def lease_expires(text):
+        PendingComment.objects.filter(text='Второй').update(
+            claimed_by='другой'
+        )
+        return rejection_reason(text)
+
+    monkeypatch.setattr(moderation, 'rejection_reason', lease_expires)
+    assert moderation.process_batch(10) == (1, 0)
+    assert list(Comment.objects.values_list('text', flat=True)) == ['Первый']
+    assert list(
+        PendingComment.objects.values_list('text', 'claimed_by')
+    ) == [('Второй', 'другой')]
+
+
+@pytest.mark.parametrize('fmt', ('jsonl', 'csv'))
+def test_comments_export_import_roundtrip(
+    fmt, tmp_path, comments_order_check, news
+):
+    path = tmp_path / f'comments.{fmt}'
+    expected = list(Comment.objects.values_list(
+        'news', 'author', 'text', 'created'
+    ))
+    call_command(
+        'export_news', str(path), '--comments', f'--format={fmt}'
+    )
+    Comment.objects.all().delete()
+    call_command(
+        'import_comments', str(path), f'--format={fmt}', '--chunk-size=3',
+        stdout=StringIO(),
+    )
+    assert list(Comment.objects.values_list(
+        'news', 'author', 'text', 'created'
+    )) == expected
+    news.refresh_from_db()
+    assert news.comment_count == len(expected)
+
+
+@pytest.mark.parametrize('fmt, content, bad_lines', (
+    (
+        'csv',
+        'news,author,text\n'
+        '{news},{author},Первый\n'
+        'abc,{author},Id не число\n'
+        '{news}\n'
+        '99999999999999999999,{author},Id слишком большой\n'
+        '{news},{author},Второй\n',
+        [3, 4, 5],
+    ),
+    (
+        'jsonl',
+        '{{"news": {news}, "author": "{author}", "text": "Первый"}}\n'
+        '{{"news": "abc", "author": "{author}", "text": "Id не число"}}\n'
+        '{{"news": {news}}}\n'
+        '{{не json\n'
+        '{{"news": {news}, "author": "{author}", "text": "Второй"}}\n',
+        [2, 3, 4],
+    ),
+))
+def test_import_skips_malformed_rows(
+    tmp_path, news, author, fmt, content, bad_lines
+):
+    path = tmp_path / f'comments.{fmt}'
+    path.write_text(
+        content.format(news=news.pk, author=author.username),
+        encoding='utf-8',
+    )
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        'import_comments', str(path), f'--format={fmt}', '--chunk-size=2',
+        stdout=stdout, stderr=stderr,
+    )
+    assert list(Comment.objects.values_list('text', flat=True)) == [
+        'Первый', 'Второй'
+    ]
+    assert stderr.getvalue().splitlines() == [
+        f'Строка {line}: некорректная запись.' for line in bad_lines
+    ]
+    assert 'некорректных: 3' in stdout.getvalue()
+    news.refresh_from_db()
+    assert news.comment_count == 2
+
+
+def test_rebuild_search_index(client, news, reverse_url):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO news_news_fts(news_news_fts) VALUES ('delete-all')"
+        )
+    call_command('rebuild_search_index', stdout=StringIO())
+    response = client.get(reverse_url['news:search'], {'q': news.title})
+    assert list(response.context['object_list']) == [news]
+
+
+def month_counts():
+    return dict(
+        ((month.year, month.month), month.count)
+        for month in NewsMonthCount.objects.all()
+    )
+
+
+def test_archive_counts_follow_news_changes():
+    news = News.objects.create(
+        title='Архивная', text='Текст', date=date(2020, 1, 15)
+    )
+    News.objects.create(title='Ещё одна', text='Текст', date=date(2020, 1, 1))
+    assert month_counts() == {(2020, 1): 2}
+    news = News.objects.get(pk=news.pk)
+    news.date = date(2020, 2, 1)
+    news.save()
+    assert month_counts() == {(2020, 1): 1, (2020, 2): 1}
+    news.delete()
+    assert month_counts() == {(2020, 1): 1, (2020, 2): 0}
+    NewsMonthCount.objects.all().delete()
+    call_command('rebuild_news_archive', stdout=StringIO())
+    assert month_counts() == {(2020, 1): 1}
+
+
+def test_profiling_report(client, settings, tmp_path, news_detail_url):
+    settings.PROFILING_SAMPLE_RATE = 1
+    settings.PROFILING_DIR = tmp_path
+    client.get(news_detail_url)
+    client.get(news_detail_url)
+    output = StringIO()
+    call_command('profiling_report', stdout=output)
+    report = output.getvalue()
+    assert 'news:detail: 2 замеров' in report
+    assert 'шаблоны' in report
+
+
+def test_profiling_async_request(settings, tmp_path, rf, news):
+    settings.PROFILING_SAMPLE_RATE = 1
+    settings.PROFILING_DIR = tmp_path
+
+    async def view(request):
+        await sync_to_async(list)(News.objects.all())
+        return HttpResponse()
+
+    middleware = ProfilingMiddleware(view)
+    assert asyncio.iscoroutinefunction(middleware)
+    async_to_sync(middleware)(rf.get('/'))
+    output = StringIO()
+    call_command('profiling_report', stdout=output)
+    report = output.getvalue()
+    assert '<не найден>: 1 замеров' in report
+    assert '(1.0 запросов), шаблоны без cProfile' in report
+
+
+@pytest.mark.parametrize(
+    'backend', ('LocalBackend', 'CacheBackend', 'SQLiteBackend')
+)
+def test_comments_rate_limited(
+    author_client, news_detail_url, settings, tmp_path, backend
+):
+    settings.RATELIMIT_BACKEND = f'news.ratelimit.{backend}'
+    settings.RATELIMIT_SQLITE_PATH = tmp_path / 'ratelimit.sqlite3'
+    settings.RATELIMITS = {'comment': {'ip': (100, 60), 'user': (2, 60)}}
+    Comment.objects.all().delete()
+    form_data = {'text': COMMENT_TEXT}
+    for _ in range(2):
+        response = author_client.post(news_detail_url, data=form_data)
+        assert response.status_code == HTTPStatus.FOUND
+    response = author_client.post(news_detail_url, data=form_data)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response['Retry-After'] == '30'
+    assert Comment.objects.count() == 2
+
+
+def test_rate_limit_by_ip_before_queries(
+    author_client, not_author_client, news_detail_url, settings
+):
+    settings.RATELIMITS = {'comment': {'ip': (1, 60), 'user': (10, 60)}}
+    form_data = {'text': COMMENT_TEXT}
+    author_client.post(news_detail_url, data=form_data)
+    with CaptureQueriesContext(connection) as context:
+        response = not_author_client.post(news_detail_url, data=form_data)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert len(context) == 0
+
+
+def test_users_behind_proxy_limited_separately(
+    author_client, not_author_client, news_detail_url, settings
+):
+    settings.RATELIMIT_TRUSTED_PROXIES = ('127.0.0.1',)
+    settings.RATELIMITS = {'comment': {'ip': (1, 60), 'user': (10, 60)}}
+    form_data = {'text': COMMENT_TEXT}
+    for client, address in (
+        (author_client, '10.0.0.1'),
+        (not_author_client, '10.0.0.2'),
+    ):
+        response = client.post(
+            news_detail_url, data=form_data,
+            HTTP_X_FORWARDED_FOR=f'{address}, 127.0.0.1',
+        )
+        assert response.status_code == HTTPStatus.FOUND
+    response = author_client.post(
+        news_detail_url, data=form_data, HTTP_X_FORWARDED_FOR='10.0.0.1'
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_forwarded_for_ignored_without_trusted_proxy(rf, settings):
+    request = rf.post('/', HTTP_X_FORWARDED_FOR='10.0.0.1')
+    assert client_ip(request) == '127.0.0.1'
+    settings.RATELIMIT_TRUSTED_PROXIES = ('127.0.0.1', '10.0.0.9')
+    request = rf.post('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.1, 10.0.0.9')
+    assert client_ip(request) == '10.0.0.1'
+
+
+def test_local_buckets_bounded(settings):
+    settings.RATELIMIT_LOCAL_MAX_KEYS = 3
+    backend = LocalBackend()
+    for index in range(10):
+        backend.take(f'key-{index}', 1, 1)
+    assert list(backend._buckets) == ['key-7', 'key-8', 'key-9']
+
+
+def test_sqlite_buckets_pruned_when_full(settings, tmp_path):
+    settings.RATELIMIT_SQLITE_PATH = tmp_path / 'ratelimit.sqlite3'
+    backend = SQLiteBackend()
+    with patch('news.ratelimit.time', return_value=1000):
+        for index in range(3):
+            backend.take(f'key-{index}', 1, 10)
+        backend.take('slow', 0.001, 1)
+    with patch('news.ratelimit.time', return_value=1060):
+        backend.take('new', 1, 10)
+    rows = backend.connection().execute(
+        'SELECT key FROM token_bucket ORDER BY key'
+    )
+    assert [key for key, in rows] == ['new', 'slow']
+
+
+def test_buffered_comment_written_before_response(
+    author_client, news_detail_url, news, settings
+):
+    settings.COMMENT_WRITE_BUFFER = True
+    Comment.objects.all().delete()
+    News.objects.filter(pk=news.pk).recount_comments()
+    response = author_client.post(
+        news_detail_url, data={'text': COMMENT_TEXT}
+    )
+    comment = Comment.objects.get()
+    assertRedirects(
+        response,
+        f'{news_detail_url}?cursor={cursor_before(comment)}#comments',
+    )
+    assert comment.text == COMMENT_TEXT
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_buffer_groups_concurrent_comments(author, news, settings):
+    settings.COMMENT_WRITE_BUFFER_SIZE = 5
+    settings.COMMENT_WRITE_BUFFER_LATENCY = 1000
+    Comment.objects.all().delete()
+    buffer = CommentWriteBuffer()
+    comments = [
+        Comment(news=news, author=author, text=f'{COMMENT_TEXT} {number}')
+        for number in range(5)
+    ]
+    with patch.object(
+        Comment.objects, 'bulk_create', wraps=Comment.objects.bulk_create
+    ) as bulk_create:
+        threads = [
+            Thread(target=buffer.write, args=(comment,))
+            for comment in comments
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert bulk_create.call_count == 1
+    assert Comment.objects.count() == 5
+    news.refresh_from_db()
+    assert news.comment_count == 5
+
+
+def test_sqlite_pragmas_applied(settings):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        assert cursor.fetchone()[0] == 1
+        cursor.execute('PRAGMA cache_size')
+        assert cursor.fetchone()[0] == settings.SQLITE_PRAGMAS['cache_size']
+
+
+def test_write_buffer_shifts_counters_without_recount(
+    author, news, comment, settings
+):
+    settings.COMMENT_WRITE_BUFFER_SIZE = 1
+    with CaptureQueriesContext(connection) as context:
+        CommentWriteBuffer().write(
+            Comment(news=news, author=author, text=COMMENT_TEXT)
+        )
+    assert not [
+        query for query in context.captured_queries
+        if 'COUNT(' in query['sql']
+    ]
+    news.refresh_from_db()
+    assert news.comment_count == 2
+
+
+def test_write_buffer_skipped_under_asgi(
+    author, news, news_detail_url, settings
+):
+    settings.COMMENT_WRITE_BUFFER = True
+    client = AsyncClient()
+    client.force_login(author)
+
+    async def post():
+        return await client.post(
+            news_detail_url,
+            data=urlencode({'text': COMMENT_TEXT}),
+            content_type='application/x-www-form-urlencoded',
+        )
+
+    with patch.object(CommentWriteBuffer, 'write') as write:
+        response = async_to_sync(post)()
+    assert response.status_code == HTTPStatus.FOUND
+    assert not write.called
+    assert Comment.objects.filter(text=COMMENT_TEXT).exists()
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.urls import reverse
+
+from news.metrics import MetricsMiddleware, registry
+from news.models import News
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    registry.reset()
+
+
+def scrape(client):
+    return client.get(reverse('metrics')).content.decode()
+
+
+def test_metrics_count_requests_cache_and_writes(
+    client, author_client, news_detail_url
+):
+    client.get(news_detail_url)
+    client.get(news_detail_url)
+    author_client.post(news_detail_url, data={'text': 'Комментарий'})
+    metrics = scrape(client)
+    assert (
+        'http_requests_total{method="GET",status="200",'
+        'view="news:detail"} 2.0'
+    ) in metrics
+    assert (
+        'http_request_duration_seconds_count{view="news:detail"} 3.0'
+    ) in metrics
+    assert 'cache_requests_total{cache="page",result="hit"} 1.0' in metrics
+    assert 'cache_requests_total{cache="page",result="miss"} 1.0' in metrics
+    assert 'comment_writes_total{action="create"} 1.0' in metrics
+    assert '# TYPE http_request_duration_seconds histogram' in metrics
+
+
+def test_metrics_merged_across_processes(
+    client, author_client, settings, tmp_path, news_detail_url
+):
+    settings.METRICS_DIR = tmp_path
+    (tmp_path / '1-other.json').write_text(json.dumps(
+        [['comment_writes_total', [['action', 'create']], 5]]
+    ))
+    author_client.post(news_detail_url, data={'text': 'Комментарий'})
+    assert 'comment_writes_total{action="create"} 6.0' in scrape(client)
+
+
+@pytest.mark.parametrize('sample_rate', (0, 1))
+def test_middleware_chain_stays_async(settings, caplog, sample_rate):
+    settings.DEBUG = True
+    settings.PROFILING_SAMPLE_RATE = sample_rate
+    with caplog.at_level(logging.DEBUG, logger='django.request'):
+        ASGIHandler()
+    assert 'adapted' not in caplog.text
+
+
+def test_async_request_queries_counted(rf, news):
+    async def view(request):
+        await sync_to_async(list)(News.objects.all())
+        return HttpResponse()
+
+    middleware = MetricsMiddleware(view)
+    assert asyncio.iscoroutinefunction(middleware)
+    async_to_sync(middleware)(rf.get('/'))
+    assert registry.collect()[('db_queries_total', (('view', ''),))] == 1
@@ -0,0 +1,81 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from news.models import News
+from news.pytest_tests.conftest import QUERY_BUDGETS, WRITE_QUERY_BUDGETS
+from news.views import CommentUpdate
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return ' '.join(row[-1] for row in cursor.fetchall())
+
+
+def captured_plans(client, url, table):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    return [
+        explain(query['sql']) for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql']
+    ]
+
+
+@pytest.mark.parametrize(
+    'name, table, index',
+    (
+        ('news:home', 'news_news', 'news_date_id_idx'),
+        ('news:detail', 'news_comment', 'comment_news_created_idx'),
+    )
+)
+def test_page_queries_use_indexes(
+    client, comment, news_detail_url, reverse_url, name, table, index
+):
+    url = news_detail_url if name == 'news:detail' else reverse_url[name]
+    plans = captured_plans(client, url, table)
+    assert plans
+    for plan in plans:
+        assert index in plan
+        assert 'TEMP B-TREE' not in plan
+
+
+def test_comment_base_queryset_uses_index(rf, author, comment):
+    view = CommentUpdate()
+    view.request = rf.get('/')
+    view.request.user = author
+    plan = view.get_queryset().explain()
+    assert 'comment_author_created_idx' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+@pytest.mark.parametrize('name', QUERY_BUDGETS)
+def test_pages_within_query_budget(
+    author_client, query_budget, news_order_check, comments_order_check,
+    reverse_url, name
+):
+    with query_budget(name):
+        author_client.get(reverse_url[name])
+
+
+@pytest.mark.parametrize(
+    'name, data',
+    (
+        ('news:detail', {'text': 'Новый комментарий'}),
+        ('news:edit', {'text': 'Правка'}),
+        ('news:delete', {}),
+    )
+)
+def test_comment_writes_within_query_budget(
+    author_client, query_budget, reverse_url, name, data
+):
+    with query_budget(name, WRITE_QUERY_BUDGETS):
+        response = author_client.post(reverse_url[name], data=data)
+    assert response.url.endswith('#comments')
+
+
+def test_query_budget_fails_over_limit(query_budget, news_order_check):
+    with pytest.raises(pytest.fail.Exception, match='news:search'):
+        with query_budget('news:search'):
+            for news in News.objects.all():
+                news.comment_set.count()
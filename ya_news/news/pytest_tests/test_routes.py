@@ -8,6 +8,8 @@ from pytest_django.asserts import assertRedirects
     'name',
     (
         'news:home',
+        'news:search',
+        'news:archive',
         'users:login',
         'users:logout',
         'users:signup',
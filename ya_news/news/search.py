@@ -0,0 +1,167 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import News
+
+NEWS_FTS = 'news_news_fts'
+COMMENT_FTS = 'news_comment_fts'
+
+TOKENIZE = "tokenize='unicode61 remove_diacritics 2'"
+# Внешнее содержимое: FTS5 хранит только индекс, а сами тексты берёт
+# из таблиц моделей. Триггеры поддерживают индекс при любых изменениях,
+# включая bulk_create и массовое удаление в обход сигналов Django.
+CREATE_INDEX = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {NEWS_FTS} USING fts5('
+    f"title, text, content='news_news', content_rowid='id', {TOKENIZE})",
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {COMMENT_FTS} USING fts5('
+    f"text, content='news_comment', content_rowid='id', {TOKENIZE})",
+)
+CREATE_TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS news_news_fts_insert '
+    'AFTER INSERT ON news_news BEGIN '
+    f'INSERT INTO {NEWS_FTS}(rowid, title, text) '
+    'VALUES (new.id, new.title, new.text); END',
+    'CREATE TRIGGER IF NOT EXISTS news_news_fts_delete '
+    'AFTER DELETE ON news_news BEGIN '
+    f'INSERT INTO {NEWS_FTS}({NEWS_FTS}, rowid, title, text) '
+    "VALUES ('delete', old.id, old.title, old.text); END",
+    'CREATE TRIGGER IF NOT EXISTS news_news_fts_update '
+    'AFTER UPDATE OF title, text ON news_news BEGIN '
+    f'INSERT INTO {NEWS_FTS}({NEWS_FTS}, rowid, title, text) '
+    "VALUES ('delete', old.id, old.title, old.text); "
+    f'INSERT INTO {NEWS_FTS}(rowid, title, text) '
+    'VALUES (new.id, new.title, new.text); END',
+    'CREATE TRIGGER IF NOT EXISTS news_comment_fts_insert '
+    'AFTER INSERT ON news_comment BEGIN '
+    f'INSERT INTO {COMMENT_FTS}(rowid, text) VALUES (new.id, new.text); END',
+    'CREATE TRIGGER IF NOT EXISTS news_comment_fts_delete '
+    'AFTER DELETE ON news_comment BEGIN '
+    f'INSERT INTO {COMMENT_FTS}({COMMENT_FTS}, rowid, text) '
+    "VALUES ('delete', old.id, old.text); END",
+    'CREATE TRIGGER IF NOT EXISTS news_comment_fts_update '
+    'AFTER UPDATE OF text ON news_comment BEGIN '
+    f'INSERT INTO {COMMENT_FTS}({COMMENT_FTS}, rowid, text) '
+    "VALUES ('delete', old.id, old.text); "
+    f'INSERT INTO {COMMENT_FTS}(rowid, text) VALUES (new.id, new.text); END',
+)
+REBUILD_INDEX = tuple(
+    f"INSERT INTO {table}({table}) VALUES ('rebuild')"
+    for table in (NEWS_FTS, COMMENT_FTS)
+)
+DROP_INDEX = (
+    *(
+        f'DROP TRIGGER IF EXISTS {table}_fts_{action}'
+        for table in ('news_news', 'news_comment')
+        for action in ('insert', 'delete', 'update')
+    ),
+    f'DROP TABLE IF EXISTS {NEWS_FTS}',
+    f'DROP TABLE IF EXISTS {COMMENT_FTS}',
+)
+
+TOKEN = re.compile(r'\w+')
+
+
+def install_index(apps, schema_editor):
+    """
+    Создаёт индексы и триггеры и заполняет индексы заново.
+
+    Вызывается из миграций, в том числе после тех, что пересоздают
+    таблицы новостей и комментариев: SQLite удаляет триггеры вместе
+    со старой таблицей.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in (*CREATE_INDEX, *CREATE_TRIGGERS, *REBUILD_INDEX):
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_INDEX:
+        schema_editor.execute(statement)
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        for statement in (*CREATE_INDEX, *CREATE_TRIGGERS, *REBUILD_INDEX):
+            cursor.execute(statement)
+
+
+def match_expression(query):
+    """
+    Превращает пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки и ищется по префиксу,
+    слова объединяются через AND.
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN.findall(query))
+
+
+class NewsSearchResults:
+    """
+    Новости, найденные по тексту и, по желанию, по комментариям.
+
+    Новость с несколькими совпадениями выводится один раз с лучшим
+    рангом. Объект ленивый: Paginator запрашивает количество и нужный
+    срез, и каждый из них выполняется одним запросом к индексам.
+    """
+
+    def __init__(self, query, with_comments=False):
+        expression = match_expression(query)
+        self.matches = (
+            f'SELECT rowid AS news_id, rank FROM {NEWS_FTS} '
+            f'WHERE {NEWS_FTS} MATCH %s'
+        )
+        self.params = [expression]
+        if with_comments:
+            self.matches += (
+                ' UNION ALL SELECT news_comment.news_id, '
+                f'{COMMENT_FTS}.rank FROM {COMMENT_FTS} '
+                f'JOIN news_comment ON news_comment.id = {COMMENT_FTS}.rowid '
+                f'WHERE {COMMENT_FTS} MATCH %s'
+            )
+            self.params.append(expression)
+
+    def count(self):
+        if not self.params[0]:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT COUNT(DISTINCT news_id) '
+                f'FROM ({self.matches})',
+                self.params,
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not self.params[0]:
+            return []
+        limit = -1 if item.stop is None else item.stop - (item.start or 0)
+        return list(News.objects.raw(
+            'SELECT news_news.* FROM news_news JOIN ('
+            f'SELECT news_id, MIN(rank) AS best FROM ({self.matches}) '
+            'GROUP BY news_id ORDER BY best LIMIT %s OFFSET %s'
+            ') AS found ON found.news_id = news_news.id ORDER BY found.best',
+            [*self.params, limit, item.start or 0],
+        ))
+
+
+def search_news(query, with_comments=False):
+    if connection.vendor == 'sqlite':
+        return NewsSearchResults(query, with_comments)
+    tokens = TOKEN.findall(query)
+    if not tokens:
+        return News.objects.none()
+    condition = Q()
+    for token in tokens:
+        token_condition = Q(title__icontains=token) | Q(text__icontains=token)
+        if with_comments:
+            token_condition |= Q(comment__text__icontains=token)
+        condition &= token_condition
+    return News.objects.filter(condition).distinct()
@@ -0,0 +1,116 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .bad_words import bump_version
+from .caching import invalidate_news
+from .metrics import count_comment_writes
+from .models import BadWord, Comment, News, NewsMonthCount
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw, **kwargs):
+    """Увеличиваем счётчик комментариев новости."""
+    if created and not raw:
+        News.objects.filter(pk=instance.news_id).change_comment_count(1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Уменьшаем счётчик комментариев новости."""
+    News.objects.filter(
+        pk=instance.news_id, comment_count__gt=0
+    ).change_comment_count(-1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    """Сбрасываем кэш страниц, на которых виден комментарий."""
+    invalidate_news(instance.news_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw, **kwargs):
+    if not raw:
+        count_comment_writes('create' if created else 'update')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_removed(sender, instance, **kwargs):
+    count_comment_writes('delete')
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def news_changed(sender, instance, **kwargs):
+    """Сбрасываем кэш главной и страницы новости."""
+    invalidate_news(instance.pk)
+
+
+@receiver(post_save, sender=News)
+def news_dated(sender, instance, created, raw, **kwargs):
+    """Обновляем счётчики архива при добавлении и переносе новости."""
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_loaded_date', None)
+    if previous is not None and (
+        (previous.year, previous.month)
+        == (instance.date.year, instance.date.month)
+    ):
+        return
+    if previous is not None:
+        NewsMonthCount.objects.shift(previous, -1)
+    if created or previous is not None:
+        NewsMonthCount.objects.shift(instance.date, 1)
+    instance._loaded_date = instance.date
+
+
+@receiver(post_delete, sender=News)
+def news_undated(sender, instance, **kwargs):
+    """Убираем удалённую новость из счётчика архива."""
+    NewsMonthCount.objects.shift(instance.date, -1)
+
+
+@receiver(post_save, sender=BadWord)
+@receiver(post_delete, sender=BadWord)
+def bad_words_changed(sender, **kwargs):
+    """
+    Автомат для проверки комментариев нужно перестроить.
+
+    Версия меняется после фиксации: иначе другой процесс может успеть
+    перечитать таблицу без новой записи и запомнить старый список
+    под новой версией.
+    """
+    transaction.on_commit(bump_version)
+
+
+def comments_bulk_changed(news_ids):
+    """
+    Синхронизирует новости после массовых операций с комментариями.
+
+    bulk_create и queryset.update() не отправляют сигналы, поэтому
+    счётчики пересчитываются, а кэш сбрасывается явно.
+    """
+    news_ids = set(news_ids)
+    if news_ids:
+        News.objects.filter(pk__in=news_ids).recount_comments()
+        invalidate_news(*news_ids)
+
+
+def comments_created(comments):
+    """
+    Сдвигает счётчики новостей после bulk_create комментариев.
+
+    Счётчик каждой новости увеличивается на число её новых
+    комментариев: полный пересчёт дорог для длинных обсуждений.
+    Вызывается в транзакции вставки, чтобы счётчики не разошлись
+    с таблицей. Возвращает id новостей, кэш которых нужно сбросить
+    после фиксации.
+    """
+    counts = Counter(comment.news_id for comment in comments)
+    for news_id, created in counts.items():
+        News.objects.filter(pk=news_id).change_comment_count(created)
+    return list(counts)
@@ -0,0 +1,58 @@
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from itertools import islice
+
+FORMATS = ('jsonl', 'csv')
+
+
+@contextmanager
+def open_stream(path, mode):
+    """Открывает файл или stdin/stdout, если путь равен «-»."""
+    if path == '-':
+        yield sys.stdin if mode == 'r' else sys.stdout
+        return
+    with open(path, mode, encoding='utf-8', newline='') as file:
+        yield file
+
+
+def write_rows(file, fmt, fieldnames, rows):
+    """Построчно пишет словари в формате JSON Lines или CSV."""
+    if fmt == 'csv':
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    for row in rows:
+        file.write(json.dumps(row, ensure_ascii=False, default=str))
+        file.write('\n')
+
+
+def read_rows(file, fmt):
+    """
+    Лениво читает пары (номер строки, словарь) из JSON Lines или CSV.
+
+    Файл не загружается в память целиком. Для строки, которая
+    не разбирается как JSON, вместо словаря возвращается None.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
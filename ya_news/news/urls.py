@@ -1,16 +1,57 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import api, async_views, views
 
 app_name = 'news'
 
+
+def read_view(sync_view, async_view, name):
+    """Асинхронный вариант включается настройкой NEWS_ASYNC_VIEWS."""
+    if name in settings.NEWS_ASYNC_VIEWS:
+        return async_view
+    return sync_view.as_view()
+
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path(
+        '',
+        read_view(views.NewsList, async_views.news_list, 'home'),
+        name='home'
+    ),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('archive/', views.NewsArchive.as_view(), name='archive'),
+    path(
+        'archive/<int:year>/',
+        views.NewsYearArchive.as_view(),
+        name='archive_year'
+    ),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.NewsMonthArchive.as_view(),
+        name='archive_month'
+    ),
+    path(
+        'archive/<int:year>/<int:month>/<int:day>/',
+        views.NewsDayArchive.as_view(),
+        name='archive_day'
+    ),
+    path(
+        'news/<int:pk>/',
+        read_view(views.NewsDetailView, async_views.news_detail, 'detail'),
+        name='detail'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.news_list, name='api_list'),
+    path('api/news/<int:pk>/', api.news_detail, name='api_detail'),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.news_comments,
+        name='api_comments'
+    ),
 ]
@@ -1,14 +1,73 @@
+from datetime import date
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.cache import patch_vary_headers
 from django.views import generic
 
-from .forms import CommentForm
-from .models import Comment, News
+from .caching import (
+    cached_comment_page, home_version, news_version, page_key
+)
+from .forms import CommentForm, QueuedCommentForm
+from .metrics import count_cache
+from .models import Comment, News, NewsMonthCount
+from .moderation import enqueue
+from .pagination import cursor_before
+from .ratelimit import RateLimitMixin
+from .search import search_news
+from .write_buffer import comment_buffer
+
+
+def comment_list_url(news_id, comment=None):
+    """
+    Комментарии на странице новости.
+
+    Если передан comment, ссылка ведёт на страницу комментариев,
+    которая начинается с него.
+    """
+    url = reverse('news:detail', kwargs={'pk': news_id})
+    if comment is not None:
+        url += f'?cursor={cursor_before(comment)}'
+    return url + '#comments'
 
 
-class NewsList(generic.ListView):
+class AnonymousPageCacheMixin:
+    """
+    Кэширует страницу целиком для анонимных пользователей.
+
+    Ключ кэша включает версию из get_cache_version(): она меняется
+    при изменении данных, которые выводятся на странице. Из строки
+    запроса в ключ попадают только параметры cache_params.
+    """
+    cache_params = ()
+
+    def get_cache_version(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = page_key(
+            self.get_cache_version(), request, self.cache_params
+        )
+        content = cache.get(key)
+        count_cache('page', content is not None)
+        if content is None:
+            response = super().get(request, *args, **kwargs)
+            response.render()
+            cache.set(key, response.content, settings.NEWS_CACHE_TIMEOUT)
+        else:
+            response = HttpResponse(content)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+
+class NewsList(AnonymousPageCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
@@ -19,21 +78,119 @@ class NewsList(generic.ListView):
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def get_cache_version(self):
+        return home_version()
+
+
+class CommentPageMixin:
+    """
+    Добавляет в контекст страницу комментариев новости.
+
+    Страница задаётся курсором из GET-параметра `cursor`,
+    её размер определяется в настройках проекта. Страница кэшируется
+    без учёта пользователя, так что персональные ссылки в шаблоне
+    не мешают её переиспользовать.
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        comments, next_cursor = cached_comment_page(
+            self.object, self.request.GET.get('cursor')
+        )
+        context['comments'] = comments
+        context['next_cursor'] = next_cursor
+        return context
+
+
+class NewsSearch(generic.ListView):
+    """
+    Полнотекстовый поиск по новостям.
+
+    С параметром `comments` ищет также по тексту комментариев.
+    """
+    template_name = 'news/search.html'
+
+    def get_paginate_by(self, queryset):
+        return settings.NEWS_COUNT_ON_HOME_PAGE
+
+    def get_queryset(self):
+        return search_news(
+            self.request.GET.get('q', ''),
+            with_comments=bool(self.request.GET.get('comments')),
+        )
+
+
+class NewsArchive(generic.ListView):
+    """Навигация по архиву: месяцы с количеством новостей."""
+    template_name = 'news/archive.html'
+
+    def get_queryset(self):
+        return NewsMonthCount.objects.filter(count__gt=0)
 
 
-class NewsDetail(generic.DetailView):
+class NewsArchiveMixin:
+    model = News
+    date_field = 'date'
+    month_format = '%m'
+    allow_future = True
+
+
+class NewsYearArchive(NewsArchiveMixin, generic.YearArchiveView):
+    """
+    Месяцы года, в которых есть новости.
+
+    Список месяцев берётся из заранее посчитанных счётчиков
+    вместо группировки по всей таблице новостей.
+    """
+    template_name = 'news/archive_year.html'
+
+    def get_date_list(self, queryset, date_type=None, ordering='ASC'):
+        year = int(self.get_year())
+        self.months = NewsMonthCount.objects.filter(
+            year=year, count__gt=0
+        ).order_by('month')
+        if not self.months and not self.get_allow_empty():
+            raise Http404('В этом году новостей нет.')
+        return [date(year, month.month, 1) for month in self.months]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['months'] = self.months
+        return context
+
+
+class NewsMonthArchive(NewsArchiveMixin, generic.MonthArchiveView):
+    """Новости за месяц."""
+    template_name = 'news/archive_list.html'
+
+    def get_paginate_by(self, queryset):
+        return settings.NEWS_COUNT_ON_HOME_PAGE
+
+
+class NewsDayArchive(NewsArchiveMixin, generic.DayArchiveView):
+    """Новости за день."""
+    template_name = 'news/archive_list.html'
+
+    def get_paginate_by(self, queryset):
+        return settings.NEWS_COUNT_ON_HOME_PAGE
+
+
+class NewsDetail(
+        AnonymousPageCacheMixin,
+        CommentPageMixin,
+        generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
+    cache_params = ('cursor',)
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
+
+    def get_cache_version(self):
+        return news_version(self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -43,28 +200,53 @@ class NewsDetail(generic.DetailView):
 
 
 class NewsComment(
+        RateLimitMixin,
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
     model = News
     form_class = CommentForm
     template_name = 'news/detail.html'
+    ratelimit_scope = 'comment'
 
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_form_class(self):
+        if settings.COMMENT_MODERATION_ASYNC:
+            return QueuedCommentForm
+        return super().get_form_class()
+
     def form_valid(self, form):
-        comment = form.save(commit=False)
-        comment.news = self.object
-        comment.author = self.request.user
-        comment.save()
+        """
+        Сохраняет комментарий.
+
+        В режиме асинхронной модерации комментарий только ставится
+        в очередь и появится на странице после проверки. С буфером
+        записи комментарии одновременных запросов записываются вместе;
+        под ASGI буфер не используется (см. CommentWriteBuffer).
+        """
+        self.comment = None
+        if settings.COMMENT_MODERATION_ASYNC:
+            enqueue(self.object, self.request.user, form.cleaned_data['text'])
+            return super().form_valid(form)
+        self.comment = form.save(commit=False)
+        self.comment.news = self.object
+        self.comment.author = self.request.user
+        if settings.COMMENT_WRITE_BUFFER and not isinstance(
+            self.request, ASGIRequest
+        ):
+            comment_buffer.write(self.comment)
+        else:
+            self.comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        """Страница комментариев, на которой виден новый комментарий."""
+        return comment_list_url(self.object.pk, self.comment)
 
 
 class NewsDetailView(generic.View):
@@ -83,14 +265,19 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
-        return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
-        ) + '#comments'
+        """Объект уже загружен в get_object(), повторный запрос не нужен."""
+        return comment_list_url(self.object.news_id, self.object)
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Новость загружается вместе с комментарием: её заголовок
+        выводится на страницах редактирования и удаления.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -0,0 +1,78 @@
+from threading import Event, Lock
+
+from django.conf import settings
+from django.db import transaction
+
+from .caching import invalidate_news
+from .metrics import count_comment_writes
+from .models import Comment
+from .signals import comments_created
+
+
+class Batch:
+    """Комментарии, которые будут записаны одной транзакцией."""
+
+    def __init__(self):
+        self.comments = []
+        self.full = Event()
+        self.done = Event()
+        self.error = None
+
+    def flush(self):
+        try:
+            with transaction.atomic():
+                Comment.objects.bulk_create(self.comments)
+                news_ids = comments_created(self.comments)
+            invalidate_news(*news_ids)
+            count_comment_writes('create', len(self.comments))
+        except Exception as error:
+            self.error = error
+        finally:
+            self.done.set()
+
+
+class CommentWriteBuffer:
+    """
+    Собирает комментарии из одновременных запросов в одну запись.
+
+    Первый запрос пачки становится ведущим: ждёт до
+    COMMENT_WRITE_BUFFER_LATENCY миллисекунд или пока в пачке не
+    наберётся COMMENT_WRITE_BUFFER_SIZE комментариев и записывает всю
+    пачку одним bulk_create. Остальные запросы ждут, пока запись
+    завершится, поэтому клиент получает ответ только после COMMIT.
+    Ошибка записи достаётся всем запросам пачки.
+
+    Буфер рассчитан на многопоточный WSGI-сервер. Под ASGI Django 3.2
+    выполняет синхронные представления в одном потоке: ведущий
+    блокировал бы его, остальные запросы не могли бы присоединиться,
+    и каждый комментарий только ждал бы лишние миллисекунды. Поэтому
+    NewsComment под ASGI сохраняет комментарии сразу.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._batch = None
+
+    def write(self, comment):
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = Batch()
+            batch.comments.append(comment)
+            if len(batch.comments) >= settings.COMMENT_WRITE_BUFFER_SIZE:
+                self._batch = None
+                batch.full.set()
+        if leader:
+            batch.full.wait(settings.COMMENT_WRITE_BUFFER_LATENCY / 1000)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            batch.flush()
+        else:
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+
+
+comment_buffer = CommentWriteBuffer()
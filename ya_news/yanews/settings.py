@@ -1,4 +1,5 @@
 from pathlib import Path
+from tempfile import gettempdir
 
 from django.urls import reverse_lazy
 
@@ -21,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.metrics.MetricsMiddleware',
+    'news.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,6 +58,34 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение потока-обработчика живёт между запросами.
+        'CONN_MAX_AGE': 60,
+        # Сколько секунд ждать снятия блокировки записи (busy timeout).
+        'OPTIONS': {'timeout': 20},
+    }
+}
+
+# PRAGMA для каждого соединения с SQLite. В режиме WAL чтение не
+# блокирует запись и наоборот; synchronous=NORMAL в WAL не теряет
+# целостность, но последние транзакции могут пропасть при сбое ОС.
+# cache_size отрицательный — в килобайтах, mmap_size — в байтах.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -32000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Кэш общий для всех процессов-обработчиков на машине: версии
+# страниц меняются при записи в одном процессе, а устаревшие копии
+# не должны отдаваться из других. Кэш в памяти процесса (LocMemCache)
+# для этого не подходит.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(gettempdir()) / 'yanews-cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 
@@ -80,3 +111,59 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+NEWS_CACHE_TIMEOUT = 60 * 5
+
+# Файл с дополнительными запрещёнными словами, по одному на строку.
+BAD_WORDS_FILE = None
+# Файл с версией таблицы запрещённых слов, общий для всех процессов:
+# при её изменении каждый процесс перечитывает список.
+BAD_WORDS_VERSION_FILE = Path(gettempdir()) / 'yanews-bad-words.version'
+
+# Асинхронная модерация: комментарии попадают в очередь и публикуются
+# командой moderate_comments.
+COMMENT_MODERATION_ASYNC = False
+COMMENT_MODERATION_BATCH_SIZE = 100
+# Через сколько секунд взятая в работу запись снова считается свободной.
+COMMENT_MODERATION_LEASE = 60
+
+# Буфер записи комментариев: комментарии одновременных запросов
+# собираются до COMMENT_WRITE_BUFFER_SIZE штук, но не дольше
+# COMMENT_WRITE_BUFFER_LATENCY миллисекунд, и записываются одной
+# транзакцией. Только для многопоточного WSGI: под ASGI буфер
+# не используется.
+COMMENT_WRITE_BUFFER = False
+COMMENT_WRITE_BUFFER_SIZE = 50
+COMMENT_WRITE_BUFFER_LATENCY = 5
+
+# Имена URL (без пространства имён news), для которых под ASGI
+# используются асинхронные представления, например ('home', 'detail').
+NEWS_ASYNC_VIEWS = ()
+
+# Профилирование: доля запросов под cProfile (0 — выключено), каталог
+# с замерами и сколько самых затратных функций сохранять для запроса.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_DIR = BASE_DIR / 'profiling'
+PROFILING_TOP_FUNCTIONS = 20
+
+# Метрики для /metrics. Каталог, общий для всех процессов-обработчиков:
+# каждый процесс пишет туда свои значения не чаще раза в
+# METRICS_FLUSH_INTERVAL секунд. None — только текущий процесс.
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+
+# Ограничение частоты записи: хранилище корзин токенов
+# (news.ratelimit.LocalBackend, CacheBackend или SQLiteBackend)
+# и лимиты — (запросов, за секунд) отдельно на IP и на пользователя.
+RATELIMIT_BACKEND = 'news.ratelimit.LocalBackend'
+RATELIMIT_SQLITE_PATH = BASE_DIR / 'ratelimit.sqlite3'
+RATELIMIT_LOCAL_MAX_KEYS = 100000
+# Как часто SQLiteBackend удаляет наполнившиеся корзины, в секундах.
+RATELIMIT_SQLITE_PRUNE_INTERVAL = 60
+# Адреса обратных прокси, которым можно верить в X-Forwarded-For.
+RATELIMIT_TRUSTED_PROXIES = ()
+RATELIMITS = {
+    'comment': {'ip': (60, 60), 'user': (10, 60)},
+}
@@ -0,0 +1,273 @@
+import json
+from collections import Counter, namedtuple
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.views import generic
+
+from .forms import WARNING, NoteForm
+from .models import Note, NoteTombstone
+from .slugs import allocate_slug
+from .views import NoteBase
+
+NOT_FOUND = 'Заметка не найдена.'
+DUPLICATE = ' - slug повторяется в пакете.'
+REPEATED = 'Заметка встречается в пакете несколько раз.'
+
+# Элемент пакета: действие, номер в своём списке запроса, id заметки
+# (None для создаваемых) и форма (None для удаляемых и ненайденных).
+Entry = namedtuple('Entry', ('action', 'index', 'id', 'form'))
+
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class NoteBatchForm(NoteForm):
+    """Форма для пакета: уникальность slug проверяется сразу для всех."""
+
+    def clean_slug(self):
+        return self.cleaned_data.get('slug')
+
+
+def serialize_note(note):
+    return {'id': note.pk, 'slug': note.slug, 'title': note.title}
+
+
+class NoteAPIBase(NoteBase):
+    """Анонимам API отвечает 403, а не перенаправлением на вход."""
+    raise_exception = True
+
+
+class NoteListAPI(NoteAPIBase, generic.View):
+    """Список заметок пользователя постранично."""
+
+    def get(self, request):
+        paginator = Paginator(
+            self.get_queryset().only('id', 'slug', 'title').order_by('id'),
+            settings.NOTES_COUNT_ON_LIST_PAGE,
+        )
+        page = paginator.get_page(request.GET.get('page'))
+        return JsonResponse({
+            'count': paginator.count,
+            'page': page.number,
+            'num_pages': paginator.num_pages,
+            'results': [serialize_note(note) for note in page],
+        })
+
+
+class NoteBatchAPI(NoteAPIBase, generic.View):
+    """
+    Пакетное создание, изменение и удаление заметок.
+
+    Тело запроса: {"create": [...], "update": [...], "delete": [id, ...]}.
+    Пакет проверяется и применяется в одной транзакции и только
+    целиком: если хоть один элемент не прошёл проверку или его slug
+    успел занять параллельный запрос, ничего не сохраняется, а в ответе
+    перечислены ошибки по каждому элементу. Результаты идут в порядке
+    элементов запроса, у каждого есть действие, номер в своём списке
+    и id заметки.
+    """
+
+    def post(self, request):
+        try:
+            batch = json.loads(request.body)
+            creates = list(batch.get('create', ()))
+            updates = list(batch.get('update', ()))
+            deletes = list(batch.get('delete', ()))
+            if not all(isinstance(item, dict) for item in creates + updates):
+                raise TypeError
+            ids = [item.get('id') for item in updates] + deletes
+            if not all(map(is_id, ids)):
+                raise TypeError
+        except (AttributeError, TypeError, ValueError):
+            return self.error('Некорректный JSON.')
+        if len(creates) + len(ids) > settings.NOTES_API_BATCH_SIZE:
+            return self.error('Слишком большой пакет.')
+        return self.process(creates, updates, deletes)
+
+    @transaction.atomic
+    def process(self, creates, updates, deletes):
+        ids = [item['id'] for item in updates] + deletes
+        notes = self.get_queryset().in_bulk(ids)
+        repeated = {pk for pk, times in Counter(ids).items() if times > 1}
+        entries = [
+            Entry('create', index, None, NoteBatchForm(data=item))
+            for index, item in enumerate(creates)
+        ]
+        entries += [
+            Entry(
+                'update', index, item['id'],
+                self.update_form(notes[item['id']], item)
+                if item['id'] in notes else None,
+            )
+            for index, item in enumerate(updates)
+        ]
+        entries += [
+            Entry('delete', index, pk, None)
+            for index, pk in enumerate(deletes)
+        ]
+        self.check_slugs(
+            [
+                entry.form for entry in entries
+                if entry.form is not None and entry.form.is_valid()
+            ],
+            set(deletes),
+        )
+        results = None
+        if not any(
+            self.entry_errors(entry, notes, repeated) for entry in entries
+        ):
+            results = self.apply(entries, deletes)
+        if results is not None:
+            return JsonResponse({'results': results})
+        transaction.set_rollback(True)
+        return JsonResponse(
+            {'results': [
+                self.result(
+                    entry, errors=self.entry_errors(entry, notes, repeated)
+                )
+                for entry in entries
+            ]},
+            status=HTTPStatus.BAD_REQUEST,
+        )
+
+    def error(self, message):
+        return JsonResponse(
+            {'error': message}, status=HTTPStatus.BAD_REQUEST
+        )
+
+    def update_form(self, note, item):
+        """Поля, которых нет в элементе пакета, остаются прежними."""
+        data = {field: getattr(note, field) for field in NoteForm.Meta.fields}
+        data.update(item)
+        return NoteBatchForm(data=data, instance=note)
+
+    def check_slugs(self, forms, deleted):
+        """
+        Проверяет slug всех элементов пакета одним запросом.
+
+        Пустые slug подбираются здесь же, а не при сохранении: они
+        не должны совпасть со slug других элементов пакета.
+        """
+        seen = set()
+        for form in forms:
+            slug = form.cleaned_data['slug']
+            if not slug or slug == form.initial.get('slug'):
+                continue
+            if slug in seen:
+                form.add_error('slug', slug + DUPLICATE)
+            seen.add(slug)
+        taken = dict(Note.objects.filter(
+            slug__in=seen
+        ).exclude(pk__in=deleted).values_list('slug', 'pk'))
+        for form in forms:
+            slug = form.cleaned_data.get('slug')
+            if slug in taken and taken[slug] != form.instance.pk:
+                form.add_error('slug', slug + WARNING)
+        max_length = Note._meta.get_field('slug').max_length
+        for form in forms:
+            if form.errors or form.cleaned_data['slug']:
+                continue
+            slug = allocate_slug(
+                Note.objects.exclude(pk=form.instance.pk),
+                form.cleaned_data['title'],
+                max_length,
+                reserved=seen,
+            )
+            form.cleaned_data['slug'] = form.instance.slug = slug
+            seen.add(slug)
+
+    def entry_errors(self, entry, notes, repeated):
+        if entry.action != 'create' and entry.id not in notes:
+            return {'__all__': [NOT_FOUND]}
+        if entry.id in repeated:
+            return {'__all__': [REPEATED]}
+        return entry.form.errors if entry.form is not None else {}
+
+    def result(self, entry, errors=None, **fields):
+        result = {'action': entry.action, 'index': entry.index, 'id': entry.id}
+        if errors:
+            return {**result, 'status': 'error', 'errors': errors}
+        return {**result, 'status': 'ok', **fields}
+
+    def apply(self, entries, deletes):
+        """
+        Сохраняет проверенный пакет.
+
+        Если slug заметки успел занять параллельный запрос, ошибка
+        добавляется в форму элемента, и возвращается None.
+        """
+        self.get_queryset().filter(pk__in=deletes).delete()
+        results = []
+        failed = False
+        for entry in entries:
+            if entry.form is None:
+                results.append(self.result(entry))
+                continue
+            note = entry.form.save(commit=False)
+            note.author = self.request.user
+            try:
+                with transaction.atomic():
+                    note.save()
+            except IntegrityError:
+                entry.form.add_error('slug', note.slug + WARNING)
+                failed = True
+            results.append(self.result(entry, **serialize_note(note)))
+        return None if failed else results
+
+
+class NoteSyncAPI(NoteAPIBase, generic.View):
+    """
+    Изменения заметок пользователя после курсора `since`.
+
+    Курсор — номер изменения из счётчика автора. Ответ содержит
+    изменённые заметки и надгробия удалённых в порядке номеров и курсор,
+    с которым нужно прийти за следующей порцией.
+    """
+
+    def get(self, request):
+        try:
+            since = int(request.GET.get('since', 0))
+        except ValueError:
+            return JsonResponse(
+                {'error': 'Некорректный курсор.'},
+                status=HTTPStatus.BAD_REQUEST,
+            )
+        limit = settings.NOTES_SYNC_PAGE_SIZE
+        notes = self.get_queryset().filter(
+            version__gt=since
+        ).order_by('version')[:limit + 1]
+        tombstones = NoteTombstone.objects.filter(
+            author=request.user, version__gt=since
+        ).order_by('version')[:limit + 1]
+        changes = sorted(
+            [('changed', note) for note in notes]
+            + [('deleted', tombstone) for tombstone in tombstones],
+            key=lambda change: change[1].version,
+        )
+        more = len(changes) > limit
+        changes = changes[:limit]
+        return JsonResponse({
+            'changed': [
+                self.serialize_note(note)
+                for kind, note in changes if kind == 'changed'
+            ],
+            'deleted': [
+                {'id': tombstone.note_id, 'slug': tombstone.slug}
+                for kind, tombstone in changes if kind == 'deleted'
+            ],
+            'cursor': changes[-1][1].version if changes else since,
+            'more': more,
+        })
+
+    def serialize_note(self, note):
+        return {
+            **serialize_note(note),
+            'text': note.text,
+            'created': note.created.isoformat(),
+            'modified': note.modified.isoformat(),
+        }
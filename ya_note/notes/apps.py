@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .metrics import install_query_wrappers
+        from .sqlite import apply_pragmas
+
+        connection_created.connect(
+            apply_pragmas, dispatch_uid='notes.sqlite.apply_pragmas'
+        )
+        connection_created.connect(
+            install_query_wrappers,
+            dispatch_uid='notes.metrics.install_query_wrappers',
+        )
@@ -0,0 +1,37 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+
+from . import views
+
+
+def render_view(view, request, *args, **kwargs):
+    """Вызывает синхронное представление и сразу отрисовывает шаблон."""
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def async_note_page(view_class):
+    """
+    Асинхронная обёртка над страницей заметок.
+
+    Без сессионной cookie пользователь заведомо анонимный: его сразу
+    отправляют на вход, не занимая поток. Остальные запросы целиком
+    выполняются в потоке, вместе с отрисовкой шаблона.
+    """
+    view = view_class.as_view()
+    render = sync_to_async(render_view)
+
+    async def async_view(request, *args, **kwargs):
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            return redirect_to_login(request.get_full_path())
+        return await render(view, request, *args, **kwargs)
+
+    async_view.__doc__ = view_class.__doc__
+    return async_view
+
+
+notes_list = async_note_page(views.NotesList)
+note_detail = async_note_page(views.NoteDetail)
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from notes.search import drop_index, install_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_index, drop_index),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from notes.search import reinstall_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_sync'),
+    ]
+
+    operations = [
+        # В индекс добавлена колонка author_id.
+        migrations.RunPython(reinstall_index, migrations.RunPython.noop),
+    ]
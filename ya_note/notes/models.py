@@ -1,7 +1,45 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 
-from pytils.translit import slugify
+from .slugs import save_with_unique_slug
+
+# Строки журнала изменений ссылаются на автора без ограничения в БД:
+# при удалении пользователя надгробия его заметок создаются уже во время
+# каскадного удаления и не должны мешать ему завершиться.
+AUTHOR_LOG_FIELD = {
+    'to': settings.AUTH_USER_MODEL,
+    'on_delete': models.CASCADE,
+    'db_constraint': False,
+}
+
+
+class NoteSequenceQuerySet(models.QuerySet):
+
+    def next_value(self, author_id):
+        """
+        Следующий номер изменения в заметках автора.
+
+        Вызывается внутри транзакции, которая сохраняет изменение:
+        строка счётчика остаётся заблокированной до её завершения,
+        поэтому номера видны клиентам в порядке возрастания.
+        """
+        counter = self.filter(author_id=author_id)
+        if not counter.update(value=models.F('value') + 1):
+            try:
+                with transaction.atomic():
+                    self.create(author_id=author_id, value=1)
+            except IntegrityError:
+                counter.update(value=models.F('value') + 1)
+        return counter.values_list('value', flat=True).get()
+
+
+class NoteSequence(models.Model):
+    """Счётчик изменений заметок автора."""
+    author = models.OneToOneField(primary_key=True, **AUTHOR_LOG_FIELD)
+    value = models.BigIntegerField(default=0)
+
+    objects = NoteSequenceQuerySet.as_manager()
 
 
 class Note(models.Model):
@@ -23,16 +61,54 @@ class Note(models.Model):
         help_text=('Укажите адрес для страницы заметки. Используйте только '
                    'латиницу, цифры, дефисы и знаки подчёркивания')
     )
+    # Отдельный индекс по автору не нужен: его покрывает индекс из Meta.
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
+    created = models.DateTimeField(default=timezone.now, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+    version = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+            models.Index(
+                fields=('author', 'version'), name='note_author_version_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """Каждое сохранение получает новый номер изменения автора."""
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {
+                *kwargs['update_fields'], 'modified', 'version'
+            }
+        with transaction.atomic():
+            self.version = NoteSequence.objects.next_value(self.author_id)
+            if self.slug:
+                return super().save(*args, **kwargs)
+            return save_with_unique_slug(
+                self, super().save, *args, **kwargs
+            )
+
+
+class NoteTombstone(models.Model):
+    """Отметка об удалённой заметке для синхронизации клиентов."""
+    author = models.ForeignKey(db_index=False, **AUTHOR_LOG_FIELD)
+    note_id = models.BigIntegerField()
+    slug = models.SlugField(max_length=100)
+    version = models.BigIntegerField()
+    deleted = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'version'),
+                name='tombstone_author_version_idx',
+            ),
+        )
@@ -0,0 +1,234 @@
+import math
+import sqlite3
+from collections import OrderedDict
+from http import HTTPStatus
+from threading import Lock, local
+from time import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+# Модуль повторяет news/ratelimit.py проекта ya_news: проекты не зависят
+# друг от друга, поэтому правки нужно вносить в оба файла.
+
+TOO_MANY_REQUESTS = 'Слишком много запросов. Попробуйте позже.'
+
+
+def refill(state, now, rate, capacity):
+    """Токены корзины к моменту now. state — пара (токены, время)."""
+    if state is None:
+        return capacity
+    tokens, updated = state
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def spend(tokens, rate):
+    """Новое число токенов и сколько ждать, если токенов не хватило."""
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / rate
+
+
+class LocalBackend:
+    """
+    Корзины в памяти процесса: у каждого процесса свои лимиты.
+
+    Хранится не больше RATELIMIT_LOCAL_MAX_KEYS корзин: при переполнении
+    вытесняется та, к которой дольше всего не обращались. Скорее
+    всего она уже полна, а полная корзина равна отсутствующей.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, rate, capacity):
+        now = time()
+        with self._lock:
+            tokens = refill(self._buckets.get(key), now, rate, capacity)
+            tokens, wait = spend(tokens, rate)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > settings.RATELIMIT_LOCAL_MAX_KEYS:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBackend:
+    """
+    Корзины в кэше Django, общие для процессов с общим кэшем.
+
+    Чтение и запись не атомарны: при одновременных запросах одного
+    пользователя лимит может быть превышен на несколько запросов.
+    """
+    version_key = 'ratelimit:version'
+
+    def take(self, key, rate, capacity):
+        now = time()
+        version = cache.get_or_set(self.version_key, uuid4().hex, None)
+        key = f'ratelimit:{version}:{key}'
+        tokens = refill(cache.get(key), now, rate, capacity)
+        tokens, wait = spend(tokens, rate)
+        cache.set(key, (tokens, now), math.ceil(capacity / rate))
+        return wait
+
+    def reset(self):
+        """Новая версия делает все прежние корзины недоступными."""
+        cache.set(self.version_key, uuid4().hex, None)
+
+
+class SQLiteBackend:
+    """
+    Корзины в отдельном файле SQLite (RATELIMIT_SQLITE_PATH).
+
+    Общий для всех процессов машины. Корзина читается и обновляется
+    в одной транзакции BEGIN IMMEDIATE по первичному ключу.
+
+    Для каждой корзины хранится время, когда она снова наполнится.
+    Не чаще раза в RATELIMIT_SQLITE_PRUNE_INTERVAL секунд процесс
+    удаляет наполнившиеся корзины: полная корзина равна отсутствующей,
+    а без этого таблица росла бы с каждым новым адресом.
+    """
+
+    def __init__(self):
+        self._connections = local()
+        self._pruned = 0
+
+    def connection(self):
+        """Соединение потока; новое, если путь в настройках изменился."""
+        path = str(settings.RATELIMIT_SQLITE_PATH)
+        connection = getattr(self._connections, 'connection', None)
+        if getattr(self._connections, 'path', None) != path:
+            if connection is not None:
+                connection.close()
+            connection = sqlite3.connect(
+                path,
+                timeout=5,
+                isolation_level=None,
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS token_bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL, updated REAL, '
+                'full_at REAL'
+                ') WITHOUT ROWID'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS token_bucket_full_at '
+                'ON token_bucket (full_at)'
+            )
+            self._connections.connection = connection
+            self._connections.path = path
+        return connection
+
+    def take(self, key, rate, capacity):
+        now = time()
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            state = connection.execute(
+                'SELECT tokens, updated FROM token_bucket WHERE key = ?',
+                (key,),
+            ).fetchone()
+            tokens, wait = spend(refill(state, now, rate, capacity), rate)
+            connection.execute(
+                'INSERT OR REPLACE INTO token_bucket VALUES (?, ?, ?, ?)',
+                (key, tokens, now, now + (capacity - tokens) / rate),
+            )
+            if now - self._pruned >= settings.RATELIMIT_SQLITE_PRUNE_INTERVAL:
+                self._pruned = now
+                connection.execute(
+                    'DELETE FROM token_bucket WHERE full_at <= ?', (now,)
+                )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return wait
+
+    def reset(self):
+        self.connection().execute('DELETE FROM token_bucket')
+
+
+_backends = {}
+
+
+def get_backend():
+    """Хранилище из настройки RATELIMIT_BACKEND, одно на процесс."""
+    path = settings.RATELIMIT_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def client_ip(request):
+    """
+    IP-адрес клиента.
+
+    За доверенным прокси из RATELIMIT_TRUSTED_PROXIES адрес берётся
+    из X-Forwarded-For: первый справа, который не принадлежит
+    доверенным прокси. Остальным заголовок подделать ничего не стоит,
+    поэтому для них используется REMOTE_ADDR.
+    """
+    address = request.META.get('REMOTE_ADDR', '')
+    trusted = settings.RATELIMIT_TRUSTED_PROXIES
+    if address not in trusted:
+        return address
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+    for hop in reversed([hop.strip() for hop in forwarded if hop.strip()]):
+        if hop not in trusted:
+            return hop
+    return address
+
+
+def take(backend, key, limit):
+    requests, period = limit
+    return backend.take(key, requests / period, requests)
+
+
+def retry_after(scope, request):
+    """
+    Сколько секунд ждать до следующего запроса или 0, если можно сейчас.
+
+    Лимиты scope из настройки RATELIMITS — пары (запросов, за секунд)
+    отдельно для IP-адреса и для вошедшего пользователя. За одним
+    адресом могут быть многие пользователи, поэтому лимит IP выше.
+    IP проверяется первым: для этого не нужна сессия из базы.
+    """
+    limits = settings.RATELIMITS[scope]
+    backend = get_backend()
+    wait = take(backend, f'{scope}:ip:{client_ip(request)}', limits['ip'])
+    if wait or not request.user.is_authenticated:
+        return wait
+    return take(backend, f'{scope}:user:{request.user.pk}', limits['user'])
+
+
+def too_many_requests(wait):
+    response = HttpResponse(
+        TOO_MANY_REQUESTS, status=HTTPStatus.TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+class RateLimitMixin:
+    """
+    Ограничивает частоту POST-запросов к представлению.
+
+    Ставится перед LoginRequiredMixin: лишние запросы получают ответ
+    429 с Retry-After, не доходя ни до сессии, ни до моделей.
+    """
+    ratelimit_scope = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method == 'POST':
+            wait = retry_after(self.ratelimit_scope, request)
+            if wait:
+                return too_many_requests(wait)
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,138 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+
+CREATE_INDEX = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "title, text, author_id, content='notes_note', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+# Внешнее содержимое: FTS5 хранит только индекс, а сами тексты берёт
+# из notes_note. Триггеры поддерживают индекс при любых изменениях,
+# включая массовые операции в обход сигналов Django. author_id тоже
+# в индексе: условие на автора входит в MATCH, и FTS5 отбирает
+# и ранжирует только заметки автора.
+CREATE_TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert '
+    'AFTER INSERT ON notes_note BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, title, text, author_id) '
+    'VALUES (new.id, new.title, new.text, new.author_id); END',
+    'CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete '
+    'AFTER DELETE ON notes_note BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text, author_id) '
+    "VALUES ('delete', old.id, old.title, old.text, old.author_id); END",
+    'CREATE TRIGGER IF NOT EXISTS notes_note_fts_update '
+    'AFTER UPDATE OF title, text, author_id ON notes_note BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text, author_id) '
+    "VALUES ('delete', old.id, old.title, old.text, old.author_id); "
+    f'INSERT INTO {FTS_TABLE}(rowid, title, text, author_id) '
+    'VALUES (new.id, new.title, new.text, new.author_id); END',
+)
+REBUILD_INDEX = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+DROP_INDEX = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+TOKEN = re.compile(r'\w+')
+
+
+def install_index(apps, schema_editor):
+    """
+    Создаёт индекс и триггеры и заполняет индекс заново.
+
+    Вызывается из миграций, в том числе после тех, что пересоздают
+    таблицу notes_note: SQLite удаляет триггеры вместе со старой таблицей.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in (CREATE_INDEX, *CREATE_TRIGGERS, REBUILD_INDEX):
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_INDEX:
+        schema_editor.execute(statement)
+
+
+def reinstall_index(apps, schema_editor):
+    """Пересоздаёт индекс, когда меняется набор его колонок."""
+    drop_index(apps, schema_editor)
+    install_index(apps, schema_editor)
+
+
+def match_expression(query, author_id):
+    """
+    Превращает пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки и ищется по префиксу в заголовке
+    и тексте, слова объединяются через AND. К ним добавляется точное
+    совпадение автора. Пустая строка — в запросе нет ни одного слова.
+    """
+    tokens = ' '.join(f'"{token}"*' for token in TOKEN.findall(query))
+    if not tokens:
+        return ''
+    return f'author_id : "{author_id}" AND {{title text}} : ({tokens})'
+
+
+class NoteSearchResults:
+    """
+    Результаты поиска по заметкам автора, отсортированные по релевантности.
+
+    Объект ленивый: Paginator запрашивает количество и нужный срез,
+    и каждый из них выполняется одним запросом к индексу.
+
+    Автор входит в выражение MATCH, поэтому FTS5 находит и ранжирует
+    только его заметки, а notes_note читается по первичному ключу
+    для найденных строк. У колонки автора одна лексема в каждой
+    строке, так что на порядок по rank она не влияет.
+    """
+
+    FROM = (
+        f'FROM {FTS_TABLE} JOIN notes_note ON notes_note.id = '
+        f'{FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH %s'
+    )
+
+    def __init__(self, author, query):
+        self.params = [match_expression(query, author.pk)]
+
+    def count(self):
+        if not self.params[0]:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) {self.FROM}', self.params)
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not self.params[0]:
+            return []
+        limit = -1 if item.stop is None else item.stop - (item.start or 0)
+        return list(Note.objects.raw(
+            'SELECT notes_note.id, notes_note.title, notes_note.slug '
+            f'{self.FROM} ORDER BY {FTS_TABLE}.rank LIMIT %s OFFSET %s',
+            [*self.params, limit, item.start or 0],
+        ))
+
+
+def search_notes(author, query):
+    if connection.vendor == 'sqlite':
+        return NoteSearchResults(author, query)
+    tokens = TOKEN.findall(query)
+    if not tokens:
+        return Note.objects.none()
+    condition = Q()
+    for token in tokens:
+        condition &= Q(title__icontains=token) | Q(text__icontains=token)
+    return Note.objects.filter(condition, author=author).order_by('id')
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .metrics import count_note_writes
+from .models import Note, NoteSequence, NoteTombstone
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    """Оставляем надгробие, чтобы клиенты узнали об удалении."""
+    NoteTombstone.objects.create(
+        author_id=instance.author_id,
+        note_id=instance.pk,
+        slug=instance.slug,
+        version=NoteSequence.objects.next_value(instance.author_id),
+    )
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, created, raw, **kwargs):
+    if not raw:
+        count_note_writes('create' if created else 'update')
+
+
+@receiver(post_delete, sender=Note)
+def note_removed(sender, instance, **kwargs):
+    count_note_writes('delete')
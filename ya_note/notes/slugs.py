@@ -0,0 +1,69 @@
+from itertools import count
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from pytils.translit import slugify
+
+DEFAULT_BASE = 'note'
+# Запас под суффикс вида «-12345» при обрезке длинных slug.
+SUFFIX_RESERVE = 6
+MAX_ATTEMPTS = 5
+
+
+def slug_variants(base, max_length):
+    """
+    Условие на base и его варианты base-2, base-3...
+
+    Диапазон slug от «base-» до «base.» («.» идёт сразу за «-»)
+    обслуживается уникальным индексом slug и не захватывает slug,
+    которые только начинаются с base, как «a» и «ab». Если base
+    обрезан по длине, номер заменяет его конец, и варианты ищутся
+    по общей части.
+    """
+    if len(base) > max_length - SUFFIX_RESERVE:
+        stem = base[:max_length - SUFFIX_RESERVE]
+        return Q(slug__gte=stem, slug__lt=stem + '~')
+    return Q(slug=base) | Q(slug__gte=f'{base}-', slug__lt=f'{base}.')
+
+
+def allocate_slug(queryset, title, max_length, reserved=()):
+    """
+    Подбирает свободный slug по заголовку одним запросом.
+
+    reserved — slug, которые ещё не сохранены, но уже заняты.
+    """
+    base = slugify(title)[:max_length] or DEFAULT_BASE
+    taken = set(queryset.filter(
+        slug_variants(base, max_length)
+    ).values_list('slug', flat=True)) | set(reserved)
+    if base not in taken:
+        return base
+    for number in count(2):
+        suffix = f'-{number}'
+        candidate = base[:max_length - len(suffix)] + suffix
+        if candidate not in taken:
+            return candidate
+
+
+def is_slug_taken(queryset, slug):
+    return queryset.filter(slug=slug).exists()
+
+
+def save_with_unique_slug(instance, save, *args, **kwargs):
+    """
+    Сохраняет объект, подбирая slug и повторяя попытку при гонке.
+
+    Если параллельный запрос успел занять тот же slug, вставка падает
+    с IntegrityError внутри точки сохранения, и slug подбирается заново.
+    """
+    model = type(instance)
+    max_length = model._meta.get_field('slug').max_length
+    queryset = model._default_manager.exclude(pk=instance.pk)
+    for attempt in range(MAX_ATTEMPTS):
+        instance.slug = allocate_slug(queryset, instance.title, max_length)
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
@@ -0,0 +1,15 @@
+from django.conf import settings
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """
+    Выполняет PRAGMA из настройки SQLITE_PRAGMAS для нового соединения.
+
+    Команды идут мимо курсора Django, чтобы не попадать в счётчики
+    SQL-запросов. Почти все PRAGMA действуют только в пределах
+    соединения, поэтому выполняются при каждом подключении.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -1,11 +1,73 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from time import perf_counter
+
 from django.contrib.auth.models import User
+from django.db import connection
 from django.urls import reverse
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 
 from notes.models import Note
+from notes.ratelimit import get_backend
+
+QueryBudget = namedtuple('QueryBudget', ('queries', 'sql_ms'))
+
+# Бюджеты страниц из urls_list: сколько запросов и миллисекунд SQL
+# допускается при открытии страницы автором заметки. Число запросов
+# не должно зависеть от количества заметок.
+QUERY_BUDGETS = {
+    'notes:home': QueryBudget(2, 50),
+    'notes:list': QueryBudget(4, 50),
+    'notes:add': QueryBudget(2, 50),
+    'notes:success': QueryBudget(2, 50),
+    'notes:search': QueryBudget(4, 50),
+    'notes:detail': QueryBudget(3, 50),
+    'notes:edit': QueryBudget(3, 50),
+    'notes:delete': QueryBudget(3, 50),
+    'users:login': QueryBudget(2, 50),
+    'users:signup': QueryBudget(2, 50),
+}
+
+
+class QueryTimer:
+    """Суммирует время выполнения запросов (для execute_wrapper)."""
+
+    def __init__(self):
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += perf_counter() - started
+
+
+class QueryBudgetMixin:
+    """Проверка бюджета запросов страницы для TestCase."""
+
+    @contextmanager
+    def assert_query_budget(self, name):
+        budget = QUERY_BUDGETS[name]
+        timer = QueryTimer()
+        with CaptureQueriesContext(connection) as context:
+            with connection.execute_wrapper(timer):
+                yield context
+        queries = context.captured_queries
+        sql_ms = timer.seconds * 1000
+        if len(queries) > budget.queries or sql_ms > budget.sql_ms:
+            self.fail(
+                f'{name}: {len(queries)} запросов за {sql_ms:.1f} мс, '
+                f'бюджет {budget.queries} запросов за {budget.sql_ms} мс:\n'
+                + '\n'.join(query['sql'] for query in queries)
+            )
+
 
+class BaseTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        get_backend().reset()
 
-class BaseTestCase(TestCase):
     @classmethod
     def setUpTestData(cls):
         # Создание авторов
@@ -44,6 +106,7 @@ class BaseTestCase(TestCase):
             'notes:list': reverse('notes:list'),
             'notes:add': reverse('notes:add'),
             'notes:success': reverse('notes:success'),
+            'notes:search': reverse('notes:search'),
             'notes:detail': reverse(
                 'notes:detail',
                 kwargs={'slug': cls.note.slug}
@@ -0,0 +1,226 @@
+import json
+from http import HTTPStatus
+from unittest.mock import patch
+
+from django.test import override_settings
+from django.urls import reverse
+
+from notes.api import NoteBatchAPI
+from notes.forms import WARNING
+from notes.models import Note
+from notes.tests.conftest import BaseTestCase
+
+
+class TestBatchAPI(BaseTestCase):
+
+    def post_batch(self, client, batch):
+        return client.post(
+            reverse('notes:api_batch'),
+            data=json.dumps(batch),
+            content_type='application/json',
+        )
+
+    def test_batch_applied_in_one_request(self):
+        other = Note.objects.create(
+            title='Удалить', text='Текст', slug='remove-me', author=self.author
+        )
+        response = self.post_batch(self.author_user_client, {
+            'create': [
+                {'title': 'Первая', 'text': 'Текст', 'slug': 'first'},
+                {'title': 'Вторая', 'text': 'Текст'},
+            ],
+            'update': [{'id': self.note.id, 'title': 'Обновлённая'}],
+            'delete': [other.id],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        actions = [item['action'] for item in response.json()['results']]
+        self.assertEqual(actions, ['create', 'create', 'update', 'delete'])
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, 'Обновлённая')
+        self.assertEqual(self.note.slug, 'test-slug')
+        self.assertFalse(Note.objects.filter(id=other.id).exists())
+        self.assertTrue(Note.objects.filter(slug='first').exists())
+
+    def test_invalid_batch_changes_nothing(self):
+        initial_note_amount = Note.objects.count()
+        response = self.post_batch(self.author_user_client, {
+            'create': [
+                {'title': 'Первая', 'text': 'Текст', 'slug': 'same'},
+                {'title': 'Вторая', 'text': 'Текст', 'slug': 'same'},
+                {'title': 'Третья', 'text': 'Текст', 'slug': self.note.slug},
+            ],
+            'update': [{'id': self.note.id, 'title': 'Не сохранится'}],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        statuses = [item['status'] for item in response.json()['results']]
+        self.assertEqual(statuses, ['ok', 'error', 'error', 'ok'])
+        self.assertIn(
+            self.note.slug + WARNING,
+            response.json()['results'][2]['errors']['slug'],
+        )
+        self.assertEqual(Note.objects.count(), initial_note_amount)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, 'Заголовок')
+
+    def test_invalid_ids_rejected(self):
+        for batch in (
+            {'update': [{'id': 'abc'}]},
+            {'update': [{'id': [1]}]},
+            {'update': [{'title': 'Без id'}]},
+            {'delete': ['1']},
+            {'delete': [True]},
+        ):
+            with self.subTest(batch=batch):
+                response = self.post_batch(self.author_user_client, batch)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+                self.assertIn('error', response.json())
+
+    def test_generated_slug_avoids_batch_slugs(self):
+        response = self.post_batch(self.author_user_client, {
+            'create': [
+                {'title': 'A', 'text': 'Текст'},
+                {'title': 'B', 'text': 'Текст', 'slug': 'a'},
+            ],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            [item['slug'] for item in response.json()['results']],
+            ['a-2', 'a'],
+        )
+
+    def test_note_updated_and_deleted_rejected(self):
+        response = self.post_batch(self.author_user_client, {
+            'update': [{'id': self.note.id, 'title': 'Обновлённая'}],
+            'delete': [self.note.id],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(
+            [item['status'] for item in response.json()['results']],
+            ['error', 'error'],
+        )
+        self.assertTrue(Note.objects.filter(id=self.note.id).exists())
+
+    def test_results_follow_input_order(self):
+        other = Note.objects.create(
+            title='Другая', text='Текст', slug='other', author=self.author
+        )
+        response = self.post_batch(self.author_user_client, {
+            'update': [
+                {'id': other.id, 'title': 'Вторая'},
+                {'id': self.note.id, 'title': 'Первая'},
+            ],
+        })
+        self.assertEqual(
+            [
+                (item['index'], item['id'])
+                for item in response.json()['results']
+            ],
+            [(0, other.id), (1, self.note.id)],
+        )
+        response = self.post_batch(self.author_user_client, {
+            'create': [{'title': 'Новая', 'text': 'Текст', 'slug': 'other'}],
+            'update': [{'id': 0}, {'id': self.note.id}],
+        })
+        self.assertEqual(
+            [
+                (item['action'], item['index'], item['id'], item['status'])
+                for item in response.json()['results']
+            ],
+            [
+                ('create', 0, None, 'error'),
+                ('update', 0, 0, 'error'),
+                ('update', 1, self.note.id, 'ok'),
+            ],
+        )
+
+    def test_concurrent_slug_reported_per_item(self):
+        check_slugs = NoteBatchAPI.check_slugs
+
+        def check_then_race(view, forms, deleted):
+            check_slugs(view, forms, deleted)
+            Note.objects.create(
+                title='Параллельная', text='Текст', slug='first',
+                author=self.not_author_user,
+            )
+
+        initial_note_amount = Note.objects.count()
+        with patch.object(NoteBatchAPI, 'check_slugs', check_then_race):
+            response = self.post_batch(self.author_user_client, {
+                'create': [
+                    {'title': 'Первая', 'text': 'Текст', 'slug': 'first'},
+                    {'title': 'Вторая', 'text': 'Текст', 'slug': 'second'},
+                ],
+            })
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        results = response.json()['results']
+        self.assertEqual(
+            [item['status'] for item in results], ['error', 'ok']
+        )
+        self.assertEqual(results[0]['errors'], {'slug': ['first' + WARNING]})
+        self.assertEqual(Note.objects.count(), initial_note_amount)
+
+    def test_batch_scoped_to_owner(self):
+        response = self.post_batch(
+            self.not_author_user_client, {'delete': [self.note.id]}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertTrue(Note.objects.filter(id=self.note.id).exists())
+        response = self.not_author_user_client.get(reverse('notes:api_list'))
+        self.assertEqual(response.json()['results'], [])
+
+    def test_anonymous_forbidden(self):
+        response = self.post_batch(self.client, {'delete': [self.note.id]})
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
+class TestSyncAPI(BaseTestCase):
+
+    def sync(self, since):
+        return self.author_user_client.get(
+            reverse('notes:api_sync'), {'since': since}
+        ).json()
+
+    def test_sync_returns_changes_after_cursor(self):
+        data = self.sync(0)
+        self.assertEqual(
+            [note['id'] for note in data['changed']], [self.note.id]
+        )
+        cursor = data['cursor']
+        self.assertEqual(self.sync(cursor)['changed'], [])
+        self.note.title = 'Новый заголовок'
+        self.note.save()
+        data = self.sync(cursor)
+        self.assertEqual(data['changed'][0]['title'], 'Новый заголовок')
+        self.assertGreater(data['cursor'], cursor)
+        cursor = data['cursor']
+        self.author_user_client.post(self.urls_list['notes:delete'])
+        data = self.sync(cursor)
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(
+            data['deleted'], [{'id': self.note.id, 'slug': self.note.slug}]
+        )
+
+    @override_settings(NOTES_SYNC_PAGE_SIZE=2)
+    def test_sync_paginated(self):
+        for index in range(3):
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст', author=self.author
+            )
+        data = self.sync(0)
+        self.assertTrue(data['more'])
+        self.assertEqual(len(data['changed']), 2)
+        data = self.sync(data['cursor'])
+        self.assertFalse(data['more'])
+        self.assertEqual(len(data['changed']), 2)
+
+    def test_sync_scoped_to_owner(self):
+        data = self.not_author_user_client.get(
+            reverse('notes:api_sync')
+        ).json()
+        self.assertEqual(data['changed'], [])
+
+    def test_author_with_notes_can_be_deleted(self):
+        self.author.delete()
+        self.assertFalse(Note.objects.exists())
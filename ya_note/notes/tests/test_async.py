@@ -0,0 +1,52 @@
+from importlib import import_module
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.test import RequestFactory
+from django.utils.functional import SimpleLazyObject
+
+from notes import async_views
+from notes.tests.conftest import BaseTestCase
+
+
+class TestAsyncViews(BaseTestCase):
+
+    def make_request(self, url, client=None):
+        """Запрос с сессией и пользователем, как после middleware."""
+        request = RequestFactory().get(url)
+        if client is not None:
+            key = client.cookies[settings.SESSION_COOKIE_NAME].value
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = key
+            request.session = import_module(
+                settings.SESSION_ENGINE
+            ).SessionStore(key)
+            request.user = SimpleLazyObject(lambda: get_user(request))
+        return request
+
+    def test_async_pages_match_sync(self):
+        pages = (
+            (async_views.notes_list, 'notes:list', {}),
+            (
+                async_views.note_detail,
+                'notes:detail',
+                {'slug': self.note.slug},
+            ),
+        )
+        for view, name, kwargs in pages:
+            with self.subTest(name=name):
+                url = self.urls_list[name]
+                expected = self.author_user_client.get(url).content
+                response = async_to_sync(view)(
+                    self.make_request(url, self.author_user_client), **kwargs
+                )
+                self.assertEqual(response.content, expected)
+
+    def test_anonymous_redirected_without_queries(self):
+        url = self.urls_list['notes:list']
+        expected = self.client.get(url)
+        with self.assertNumQueries(0):
+            response = async_to_sync(async_views.notes_list)(
+                self.make_request(url)
+            )
+        self.assertEqual(response.url, expected.url)
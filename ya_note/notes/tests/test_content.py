@@ -1,5 +1,8 @@
+from django.test import override_settings
+
 from notes.tests.conftest import BaseTestCase
 from notes.forms import NoteForm
+from notes.models import Note
 
 
 class TestContent(BaseTestCase):
@@ -26,3 +29,66 @@ class TestContent(BaseTestCase):
                 response = self.author_user_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+    def test_notes_list_paginated(self):
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст',
+                slug=f'note-{index}',
+                author=self.author,
+            )
+            for index in range(4)
+        )
+        response = self.author_user_client.get(
+            self.urls_list['notes:list'], {'page': 3}
+        )
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, 5)
+        self.assertEqual(len(page.object_list), 1)
+
+    def test_notes_list_skips_text(self):
+        response = self.author_user_client.get(self.urls_list['notes:list'])
+        for note in response.context['object_list']:
+            self.assertIn('text', note.get_deferred_fields())
+
+    def search(self, client, query):
+        response = client.get(self.urls_list['notes:search'], {'q': query})
+        return list(response.context['object_list'])
+
+    def test_search_finds_only_own_notes(self):
+        self.assertEqual(
+            self.search(self.author_user_client, 'заголов'), [self.note]
+        )
+        self.assertEqual(self.search(self.not_author_user_client, 'Текст'), [])
+
+    def test_search_index_follows_changes(self):
+        self.note.text = 'Совершенно другое содержимое'
+        self.note.save()
+        self.assertEqual(self.search(self.author_user_client, 'Текст'), [])
+        self.assertEqual(
+            self.search(self.author_user_client, 'СОДЕРЖИМОЕ'), [self.note]
+        )
+        self.note.delete()
+        self.assertEqual(self.search(self.author_user_client, 'другое'), [])
+
+    def test_search_ignores_author_column(self):
+        self.assertEqual(
+            self.search(self.author_user_client, str(self.author.pk)), []
+        )
+
+    def test_search_follows_author_change(self):
+        Note.objects.filter(pk=self.note.pk).update(
+            author=self.not_author_user
+        )
+        self.assertEqual(self.search(self.author_user_client, 'Текст'), [])
+        self.assertEqual(
+            self.search(self.not_author_user_client, 'Текст'), [self.note]
+        )
+
+    def test_search_ignores_query_syntax(self):
+        self.assertEqual(
+            self.search(self.author_user_client, '"Заголовок* ('),
+            [self.note],
+        )
@@ -1,11 +1,24 @@
+import asyncio
 from http import HTTPStatus
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
 from django.urls import reverse
 
 from pytils.translit import slugify
 
 from notes.forms import WARNING
 from notes.models import Note
+from notes.profiling import ProfilingMiddleware
+from notes.ratelimit import SQLiteBackend
+from notes.slugs import allocate_slug, slug_variants
 
 from notes.tests.conftest import BaseTestCase
 
@@ -114,3 +127,153 @@ class TestLogic(BaseTestCase):
         )
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), initial_note_amount)
+
+    def test_same_title_gets_numbered_slug(self):
+        self.form_data.pop('slug')
+        for _ in range(3):
+            self.author_user_client.post(
+                self.urls_list['notes:add'],
+                data=self.form_data,
+            )
+        base = slugify(self.form_data['title'])
+        self.assertEqual(
+            set(Note.objects.filter(
+                title=self.form_data['title']
+            ).values_list('slug', flat=True)),
+            {base, f'{base}-2', f'{base}-3'},
+        )
+
+    def test_slug_variants_skip_longer_slugs(self):
+        for slug in ('a', 'a-2', 'ab', 'a1', 'b'):
+            Note.objects.create(
+                title='a', text='t', slug=slug, author=self.author
+            )
+        variants = Note.objects.filter(slug_variants('a', 100))
+        self.assertEqual(
+            set(variants.values_list('slug', flat=True)), {'a', 'a-2'}
+        )
+        with connection.cursor() as cursor:
+            sql, params = variants.values('slug').query.sql_with_params()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertNotIn('SCAN notes_note', plan)
+        self.assertEqual(allocate_slug(Note.objects, 'a', 100), 'a-3')
+
+    def test_truncated_slug_gets_numbered(self):
+        Note.objects.create(
+            title='t', text='t', slug='abcdefghij', author=self.author
+        )
+        self.assertEqual(
+            allocate_slug(Note.objects, 'abcdefghijk', 10), 'abcdefgh-2'
+        )
+
+    def test_slug_allocation_retries_on_conflict(self):
+        base = slugify(self.form_data['title'])
+        with patch(
+            'notes.slugs.allocate_slug', side_effect=(self.note.slug, base)
+        ):
+            note = Note.objects.create(
+                title=self.form_data['title'],
+                text=self.form_data['text'],
+                author=self.author,
+            )
+        self.assertEqual(note.slug, base)
+
+
+class TestProfiling(BaseTestCase):
+
+    def test_profiling_report(self):
+        with TemporaryDirectory() as directory, self.settings(
+            PROFILING_SAMPLE_RATE=1, PROFILING_DIR=directory
+        ):
+            client = Client()
+            client.force_login(self.author)
+            client.get(self.urls_list['notes:list'])
+            output = StringIO()
+            call_command('profiling_report', stdout=output)
+        report = output.getvalue()
+        self.assertIn('notes:list: 1 замеров', report)
+        self.assertIn('шаблоны', report)
+
+    def test_profiling_async_request(self):
+        async def view(request):
+            await sync_to_async(list)(Note.objects.all())
+            return HttpResponse()
+
+        with TemporaryDirectory() as directory, self.settings(
+            PROFILING_SAMPLE_RATE=1, PROFILING_DIR=directory
+        ):
+            middleware = ProfilingMiddleware(view)
+            self.assertTrue(asyncio.iscoroutinefunction(middleware))
+            async_to_sync(middleware)(RequestFactory().get('/'))
+            output = StringIO()
+            call_command('profiling_report', stdout=output)
+        report = output.getvalue()
+        self.assertIn('<не найден>: 1 замеров', report)
+        self.assertIn('(1.0 запросов), шаблоны без cProfile', report)
+
+
+class TestRateLimit(BaseTestCase):
+
+    def test_note_creation_rate_limited(self):
+        Note.objects.all().delete()
+        with self.settings(
+            RATELIMITS={'note': {'ip': (1, 60), 'user': (30, 60)}}
+        ):
+            self.author_user_client.post(
+                self.urls_list['notes:add'], data=self.form_data
+            )
+            response = self.not_author_user_client.post(
+                self.urls_list['notes:add'], data=self.form_data
+            )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+        self.assertEqual(Note.objects.count(), 1)
+
+    def test_sqlite_backend(self):
+        with TemporaryDirectory() as directory, self.settings(
+            RATELIMIT_BACKEND='notes.ratelimit.SQLiteBackend',
+            RATELIMIT_SQLITE_PATH=f'{directory}/ratelimit.sqlite3',
+            RATELIMITS={'note': {'ip': (100, 60), 'user': (2, 60)}},
+        ):
+            statuses = [
+                self.author_user_client.post(
+                    self.urls_list['notes:add'],
+                    data={**self.form_data, 'slug': f'note-{number}'},
+                ).status_code
+                for number in range(3)
+            ]
+        self.assertEqual(
+            statuses,
+            [HTTPStatus.FOUND, HTTPStatus.FOUND, HTTPStatus.TOO_MANY_REQUESTS],
+        )
+
+    def test_sqlite_buckets_pruned_when_full(self):
+        with TemporaryDirectory() as directory, self.settings(
+            RATELIMIT_SQLITE_PATH=f'{directory}/ratelimit.sqlite3',
+        ):
+            backend = SQLiteBackend()
+            with patch('notes.ratelimit.time', return_value=1000):
+                for index in range(3):
+                    backend.take(f'key-{index}', 1, 10)
+                backend.take('slow', 0.001, 1)
+            with patch('notes.ratelimit.time', return_value=1060):
+                backend.take('new', 1, 10)
+            rows = backend.connection().execute(
+                'SELECT key FROM token_bucket ORDER BY key'
+            ).fetchall()
+            backend.connection().close()
+        self.assertEqual([key for key, in rows], ['new', 'slow'])
+
+
+class TestSQLite(BaseTestCase):
+
+    def test_pragmas_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(
+                cursor.fetchone()[0],
+                settings.SQLITE_PRAGMAS['cache_size'],
+            )
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from notes.metrics import MetricsMiddleware, registry
+from notes.models import Note
+from notes.tests.conftest import BaseTestCase
+
+
+class TestMetrics(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def scrape(self):
+        return self.client.get(reverse('metrics')).content.decode()
+
+    def test_metrics_count_requests_and_writes(self):
+        self.author_user_client.get(self.urls_list['notes:list'])
+        self.author_user_client.post(
+            self.urls_list['notes:add'], data=self.form_data
+        )
+        self.author_user_client.post(self.urls_list['notes:delete'])
+        metrics = self.scrape()
+        self.assertIn(
+            'http_requests_total{method="GET",status="200",'
+            'view="notes:list"} 1.0',
+            metrics,
+        )
+        self.assertIn('db_queries_total{view="notes:list"}', metrics)
+        self.assertIn('note_writes_total{action="create"} 1.0', metrics)
+        self.assertIn('note_writes_total{action="delete"} 1.0', metrics)
+
+    def test_metrics_merged_across_processes(self):
+        with TemporaryDirectory() as directory, self.settings(
+            METRICS_DIR=directory
+        ):
+            (Path(directory) / '1-other.json').write_text(json.dumps(
+                [['note_writes_total', [['action', 'create']], 5]]
+            ))
+            self.author_user_client.post(
+                self.urls_list['notes:add'], data=self.form_data
+            )
+            metrics = self.scrape()
+        self.assertIn('note_writes_total{action="create"} 6.0', metrics)
+
+    def test_middleware_chain_stays_async(self):
+        for sample_rate in (0, 1):
+            with self.subTest(sample_rate=sample_rate), self.settings(
+                DEBUG=True, PROFILING_SAMPLE_RATE=sample_rate
+            ), self.assertLogs('django.request', 'DEBUG') as logs:
+                ASGIHandler()
+                # assertLogs требует хотя бы одной записи.
+                logging.getLogger('django.request').debug('Готово.')
+            self.assertNotIn('adapted', '\n'.join(logs.output))
+
+    def test_async_request_queries_counted(self):
+        async def view(request):
+            await sync_to_async(list)(Note.objects.all())
+            return HttpResponse()
+
+        middleware = MetricsMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertEqual(
+            registry.collect()[('db_queries_total', (('view', ''),))], 1
+        )
@@ -0,0 +1,79 @@
+from django.db import connection
+
+from notes.models import Note
+from notes.search import FTS_TABLE, NoteSearchResults
+from notes.tests.conftest import QUERY_BUDGETS, BaseTestCase
+
+
+class TestQueryBudgets(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст',
+                slug=f'note-{index}',
+                author=cls.author,
+            )
+            for index in range(10)
+        )
+
+    def test_pages_within_query_budget(self):
+        for name in QUERY_BUDGETS:
+            with self.subTest(name=name):
+                with self.assert_query_budget(name):
+                    self.author_user_client.get(
+                        self.urls_list[name], {'q': 'Заметка'}
+                    )
+
+    def test_query_budget_fails_over_limit(self):
+        with self.assertRaisesRegex(AssertionError, 'notes:detail'):
+            with self.assert_query_budget('notes:detail'):
+                for note in Note.objects.all():
+                    note.author.username
+
+    def test_search_driven_by_fts_index(self):
+        results = NoteSearchResults(self.author, 'Заметка')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'EXPLAIN QUERY PLAN SELECT COUNT(*) {results.FROM}',
+                results.params,
+            )
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(plan[0].startswith(f'SCAN {FTS_TABLE}'), plan)
+        self.assertIn('SEARCH notes_note USING INTEGER PRIMARY KEY', plan[1])
+        self.assertEqual(results.count(), 10)
+
+    def search_steps(self):
+        """Шаги виртуальной машины SQLite на поиск по заметкам автора."""
+        # Число шагов зависит от числа сегментов индекса, а они
+        # сливаются по мере вставок: перед замером сливаем их в один.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+            )
+        steps = []
+        connection.connection.set_progress_handler(
+            lambda: steps.append(1), 1
+        )
+        try:
+            results = NoteSearchResults(self.author, 'Заметка')
+            self.assertEqual(len(results[:10]), 10)
+        finally:
+            connection.connection.set_progress_handler(None, 0)
+        return len(steps)
+
+    def test_search_cost_ignores_other_authors(self):
+        before = self.search_steps()
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст',
+                slug=f'other-{index}',
+                author=self.not_author_user,
+            )
+            for index in range(1000)
+        )
+        self.assertEqual(self.search_steps(), before)
@@ -22,6 +22,7 @@ class TestRoutes(BaseTestCase):
             'notes:list',
             'notes:add',
             'notes:success',
+            'notes:search',
         )
         for name in urls:
             with self.subTest(name=name):
@@ -69,6 +70,7 @@ class TestRoutes(BaseTestCase):
             'notes:list',
             'notes:success',
             'notes:add',
+            'notes:search',
             'notes:detail',
             'notes:edit',
             'notes:delete',
@@ -1,15 +1,36 @@
+from django.conf import settings
 from django.urls import path
 
-from notes import views
+from notes import api, async_views, views
 
 app_name = 'notes'
 
+
+def read_view(sync_view, async_view, name):
+    """Асинхронный вариант включается настройкой NOTES_ASYNC_VIEWS."""
+    if name in settings.NOTES_ASYNC_VIEWS:
+        return async_view
+    return sync_view.as_view()
+
+
 urlpatterns = [
     path('', views.Home.as_view(), name='home'),
     path('add/', views.NoteCreate.as_view(), name='add'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
-    path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
+    path(
+        'note/<slug:slug>/',
+        read_view(views.NoteDetail, async_views.note_detail, 'detail'),
+        name='detail'
+    ),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
-    path('notes/', views.NotesList.as_view(), name='list'),
+    path(
+        'notes/',
+        read_view(views.NotesList, async_views.notes_list, 'list'),
+        name='list'
+    ),
+    path('search/', views.NoteSearch.as_view(), name='search'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('api/notes/', api.NoteListAPI.as_view(), name='api_list'),
+    path('api/notes/batch/', api.NoteBatchAPI.as_view(), name='api_batch'),
+    path('api/notes/sync/', api.NoteSyncAPI.as_view(), name='api_sync'),
 ]
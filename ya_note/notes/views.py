@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.views import generic
 
 from .forms import NoteForm
 from .models import Note
+from .ratelimit import RateLimitMixin
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -26,10 +29,11 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
+class NoteCreate(RateLimitMixin, NoteBase, generic.CreateView):
     """Добавление заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
+    ratelimit_scope = 'note'
 
     def form_valid(self, form):
         new_note = form.save(commit=False)
@@ -53,7 +57,27 @@ class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_COUNT_ON_LIST_PAGE
+
+    def get_queryset(self):
+        """Загружаем только поля, которые выводятся в списке."""
+        return super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_COUNT_ON_LIST_PAGE
+
+    def get_queryset(self):
+        return search_notes(self.request.user, self.request.GET.get('q', ''))
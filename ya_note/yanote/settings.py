@@ -22,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.metrics.MetricsMiddleware',
+    'notes.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,9 +58,25 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение потока-обработчика живёт между запросами.
+        'CONN_MAX_AGE': 60,
+        # Сколько секунд ждать снятия блокировки записи (busy timeout).
+        'OPTIONS': {'timeout': 20},
     }
 }
 
+# PRAGMA для каждого соединения с SQLite. В режиме WAL чтение не
+# блокирует запись и наоборот; synchronous=NORMAL в WAL не теряет
+# целостность, но последние транзакции могут пропасть при сбое ОС.
+# cache_size отрицательный — в килобайтах, mmap_size — в байтах.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -32000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +105,39 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 50
+
+NOTES_API_BATCH_SIZE = 500
+
+NOTES_SYNC_PAGE_SIZE = 500
+
+# Имена URL (без пространства имён notes), для которых под ASGI
+# используются асинхронные представления, например ('list', 'detail').
+NOTES_ASYNC_VIEWS = ()
+
+# Профилирование: доля запросов под cProfile (0 — выключено), каталог
+# с замерами и сколько самых затратных функций сохранять для запроса.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_DIR = BASE_DIR / 'profiling'
+PROFILING_TOP_FUNCTIONS = 20
+
+# Метрики для /metrics. Каталог, общий для всех процессов-обработчиков:
+# каждый процесс пишет туда свои значения не чаще раза в
+# METRICS_FLUSH_INTERVAL секунд. None — только текущий процесс.
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+
+# Ограничение частоты записи: хранилище корзин токенов
+# (notes.ratelimit.LocalBackend, CacheBackend или SQLiteBackend)
+# и лимиты — (запросов, за секунд) отдельно на IP и на пользователя.
+RATELIMIT_BACKEND = 'notes.ratelimit.LocalBackend'
+RATELIMIT_SQLITE_PATH = BASE_DIR / 'ratelimit.sqlite3'
+RATELIMIT_LOCAL_MAX_KEYS = 100000
+# Как часто SQLiteBackend удаляет наполнившиеся корзины, в секундах.
+RATELIMIT_SQLITE_PRUNE_INTERVAL = 60
+# Адреса обратных прокси, которым можно верить в X-Forwarded-For.
+RATELIMIT_TRUSTED_PROXIES = ()
+RATELIMITS = {
+    'note': {'ip': (300, 60), 'user': (30, 60)},
+}